@@ -0,0 +1,61 @@
+"""
+Sequence risk model benchmark: batched NumPy inference over synthetic diaries.
+Times each registered model on (patients, days, features) tensors, plus loading
+the weights from a memory-mapped .npz against a full np.load.
+    python benchmarks/bench_models.py [--patients 5000] [--days 7 90 365] [--hidden 16 32]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from predictor.models import FEATURES, GRURiskModel, LinearRiskModel, load_weights, save_weights
+
+def synthetic_diaries(patients, days, seed=0):
+    # Per-patient baselines with day-to-day wobble; a quarter of diaries are shorter
+    rng = np.random.default_rng(seed)
+    base = rng.uniform([2, 5, -0.3], [9, 8.5, 0.3], (patients, 1, len(FEATURES)))
+    x = base + rng.normal(0, [1.2, 0.8, 0.2], (patients, days, len(FEATURES)))
+    lengths = np.where(rng.random(patients) < 0.25, rng.integers(1, days + 1, patients), days)
+    x[np.arange(days)[None, :] < (days - lengths)[:, None]] = 0
+    return x.astype(np.float32), lengths
+
+def timed(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--patients", type=int, default=5000)
+    parser.add_argument("--days", type=int, nargs="+", default=[7, 90, 365])
+    parser.add_argument("--hidden", type=int, nargs="+", default=[16, 32])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    models = [("linear", LinearRiskModel(LinearRiskModel.default_weights()))]
+    models += [(f"gru-{h}", GRURiskModel(GRURiskModel.default_weights(hidden=h))) for h in args.hidden]
+
+    print(f"{'model':>8} {'days':>5} {'patients':>9} {'time':>9} {'patients/s':>12}")
+    for days in args.days:
+        x, lengths = synthetic_diaries(args.patients, days)
+        for name, model in models:
+            seconds = timed(lambda: model.predict(x, lengths), args.repeat)
+            print(f"{name:>8} {days:>5} {args.patients:>9} {seconds * 1000:>7.1f}ms {args.patients / seconds:>12,.0f}")
+
+    # Weight loading: memory-mapped members vs reading every array into memory
+    with tempfile.TemporaryDirectory() as tmp:
+        path = save_weights(os.path.join(tmp, "gru.npz"), **GRURiskModel.default_weights(hidden=max(args.hidden)))
+        mapped = timed(lambda: load_weights(path), args.repeat)
+        loaded = timed(lambda: dict(np.load(path)), args.repeat)
+        print(f"weights ({os.path.getsize(path) / 1024:.0f} KiB): mmap {mapped * 1000:.2f}ms, np.load {loaded * 1000:.2f}ms")
+
+if __name__ == "__main__":
+    main()
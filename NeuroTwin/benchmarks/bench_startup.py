@@ -0,0 +1,82 @@
+"""
+Cold-start benchmark for the Streamlit entry points.
+Each entry point runs once in a fresh `python -X importtime` process under
+Streamlit's AppTest harness, so every run pays the full import cost.
+The voice worker pool is not warmed (NEUROTWIN_VOICE_WARMUP=0): its spawned
+workers would inherit -X importtime and write their imports to the same stderr.
+    python benchmarks/bench_startup.py [--repeat 3] [--top 8] [entry.py ...]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+ENTRY_POINTS = [
+    os.path.join(REPO_ROOT, "app.py"),
+    os.path.join(REPO_ROOT, "NeuroTwin", "dashboard", "app.py"),
+]
+MARKER = "-- neurotwin script start --"
+
+# Runs in the child: the harness import is timed separately from the script
+CHILD = f"""
+import json, sys, time
+started = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+ready = time.perf_counter()
+sys.stderr.write({MARKER!r} + "\\n")
+sys.stderr.flush()
+at = AppTest.from_file(sys.argv[1], default_timeout=300).run()
+done = time.perf_counter()
+print(json.dumps({{"harness": ready - started, "first_render": done - ready, "exceptions": len(at.exception)}}))
+"""
+
+def parse_importtime(stderr):
+    # Top-level imports (cumulative microseconds) made by the script itself
+    modules = {}
+    seen_marker = False
+    for line in stderr.splitlines():
+        if line.strip() == MARKER:
+            seen_marker = True
+            continue
+        if not seen_marker or not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        if name.startswith(" ") and not name.startswith("  "):
+            modules[name.strip()] = int(cumulative)
+    return modules
+
+def measure(entry_point):
+    started = time.perf_counter()
+    env = dict(os.environ, NEUROTWIN_VOICE_WARMUP="0")
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", CHILD, entry_point],
+                          cwd=REPO_ROOT, capture_output=True, text=True, env=env)
+    wall = time.perf_counter() - started
+    if proc.returncode != 0:
+        raise RuntimeError(f"{entry_point} failed to start:\n{proc.stderr[-2000:]}")
+    result = json.loads(proc.stdout.strip().splitlines()[-1])
+    result["wall"] = wall
+    result["imports"] = parse_importtime(proc.stderr)
+    return result
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("entry_points", nargs="*", default=ENTRY_POINTS)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--top", type=int, default=8, help="slowest script imports to list")
+    args = parser.parse_args(argv)
+
+    for entry_point in args.entry_points:
+        runs = [measure(entry_point) for _ in range(args.repeat)]
+        best = min(runs, key=lambda r: r["first_render"])
+        script_imports = sum(best["imports"].values()) / 1e6
+        print(f"{os.path.relpath(entry_point, REPO_ROOT)}")
+        print(f"  first render {best['first_render']:.2f}s (script imports {script_imports:.2f}s), "
+              f"harness {best['harness']:.2f}s, process {best['wall']:.2f}s, exceptions {best['exceptions']}")
+        for name, micros in sorted(best["imports"].items(), key=lambda kv: -kv[1])[:args.top]:
+            print(f"    {micros / 1e3:8.1f} ms  {name}")
+
+if __name__ == "__main__":
+    main()
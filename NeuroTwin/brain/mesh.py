@@ -0,0 +1,218 @@
+import argparse
+import functools
+import hashlib
+import logging
+import os
+import numpy as np
+
+# Cortex mesh with level-of-detail decimations.
+# The source is a vertices/faces .npz (e.g. an exported anatomical surface);
+# without one, a procedural two-hemisphere cortex is generated. LODs are
+# decimated by vertex clustering in a build step, never inside a request, and
+# stored as float32 vertices / int32 faces / uint8 regions .npy files that are
+# memory-mapped on load. The procedural low/medium LODs ship in brain/lods;
+# the rest are built into CACHE_DIR:
+#   python -m brain.mesh [--lods high] [--mesh-file cortex.npz]
+MESH_VERSION = 1
+LOD_TARGET_FACES = {"low": 2_000, "medium": 20_000, "high": 200_000}
+MESH_FILE = os.environ.get("NEUROTWIN_MESH_FILE")
+LOD_DIR = os.path.join(os.path.dirname(__file__), "lods")
+CACHE_DIR = os.environ.get("NEUROTWIN_MESH_CACHE", os.path.join(os.path.dirname(__file__), ".mesh_cache"))
+MESH_PARTS = ("vertices", "faces", "regions")
+
+REGIONS = ["Cortex", "Prefrontal", "Amygdala", "Hippocampus"]
+# Share of the risk shown as activity per region (amygdala carries the anxiety signal)
+REGION_WEIGHTS = np.array([0.2, 0.3, 1.0, 0.5], dtype=np.float32)
+
+def choose_lod(viewport_width=None, client=None, pixel_ratio=1.0, mesh_file=MESH_FILE):
+    # Pick the lightest LOD that still looks right for the client, capped at the
+    # finest one actually built (only low/medium ship; high is a deploy-time build)
+    if client == "mobile":
+        lod = "low"
+    elif viewport_width is None:
+        lod = "medium"
+    elif viewport_width * pixel_ratio < 900:
+        lod = "low"
+    elif viewport_width * pixel_ratio < 2000 or client == "tablet":
+        lod = "medium"
+    else:
+        lod = "high"
+    names = list(LOD_TARGET_FACES)
+    for candidate in reversed(names[:names.index(lod) + 1]):
+        if lod_available(candidate, mesh_file):
+            return candidate
+    return lod
+
+def lod_available(lod, mesh_file=MESH_FILE):
+    directories = [CACHE_DIR] if mesh_file else [CACHE_DIR, LOD_DIR]
+    return any(all(os.path.isfile(f"{_lod_prefix(d, lod, mesh_file)}_{part}.npy") for part in MESH_PARTS)
+               for d in directories)
+
+@functools.lru_cache(maxsize=8)
+def load_lod(lod="medium", mesh_file=MESH_FILE):
+    # Precomputed LODs only. A missing one falls back to the nearest coarser LOD
+    # that exists rather than decimating hundreds of thousands of faces in a request
+    if lod not in LOD_TARGET_FACES:
+        raise ValueError(f"Unknown LOD '{lod}', expected one of {list(LOD_TARGET_FACES)}")
+    names = list(LOD_TARGET_FACES)
+    for candidate in reversed(names[:names.index(lod) + 1]):
+        mesh = _read_lod(candidate, mesh_file)
+        if mesh is not None:
+            if candidate != lod:
+                logging.warning(f"Mesh LOD '{lod}' is not built, serving '{candidate}' (run python -m brain.mesh)")
+            return mesh
+    raise FileNotFoundError(f"No precomputed mesh LOD '{lod}' or coarser; build it with python -m brain.mesh"
+                            + (f" --mesh-file {mesh_file}" if mesh_file else ""))
+
+def build_lods(lods=tuple(LOD_TARGET_FACES), mesh_file=MESH_FILE, out_dir=None):
+    # Build step: decimate the source once per LOD and write the files load_lod reads
+    out_dir = out_dir or CACHE_DIR
+    os.makedirs(out_dir, exist_ok=True)
+    source = _source_mesh(mesh_file)
+    paths = []
+    for lod in lods:
+        vertices, faces, regions = decimate(*source, LOD_TARGET_FACES[lod])
+        mesh = (vertices.astype(np.float32), faces.astype(np.int32), regions.astype(np.uint8))
+        prefix = _lod_prefix(out_dir, lod, mesh_file)
+        for part, array in zip(MESH_PARTS, mesh):
+            tmp_path = f"{prefix}_{part}.tmp.npy"
+            np.save(tmp_path, array)
+            os.replace(tmp_path, f"{prefix}_{part}.npy")
+            paths.append(f"{prefix}_{part}.npy")
+    load_lod.cache_clear()
+    return paths
+
+def vertex_intensity(risk, lod="medium", mesh_file=MESH_FILE):
+    # The only per-update payload: one float32 per vertex
+    regions = load_lod(lod, mesh_file)[2]
+    return REGION_WEIGHTS[regions] * np.float32(risk)
+
+def decimate(vertices, faces, regions, target_faces):
+    # Vertex-clustering decimation; binary search over the grid cell size
+    if len(faces) <= target_faces:
+        return vertices, faces, regions
+    extent = float(np.ptp(vertices, axis=0).max())
+    lo, hi = extent / 2000, extent / 2
+    best = None
+    for _ in range(24):
+        cell = (lo + hi) / 2
+        result = _cluster(vertices, faces, regions, cell)
+        if best is None or abs(len(result[1]) - target_faces) < abs(len(best[1]) - target_faces):
+            best = result
+        if abs(len(result[1]) - target_faces) <= 0.05 * target_faces:
+            break
+        if len(result[1]) > target_faces:
+            lo = cell
+        else:
+            hi = cell
+    return best
+
+def generate_brain_mesh(subdivisions=7):
+    # Icosphere shaped into two hemispheres with a longitudinal fissure, a
+    # flattened base and gyral folding. Axes: x left-right, y back-front, z up.
+    unit, faces = _icosphere(subdivisions)
+    x, y, z = unit.T
+    fold = 1 + 0.03 * np.sin(19 * x) * np.sin(17 * y) * np.sin(15 * z)
+    shaped = np.stack([
+        0.72 * x + 0.035 * np.sign(x),
+        1.0 * y,
+        np.where(z > 0, 0.68 * z, 0.45 * z) - 0.12 * np.exp(-(x / 0.07) ** 2) * np.clip(z, 0, None),
+    ], axis=1) * fold[:, None]
+    return shaped, faces, _assign_regions(unit)
+
+def _source_mesh(mesh_file):
+    if mesh_file:
+        data = np.load(mesh_file)
+        vertices = np.asarray(data["vertices"], dtype=np.float64)
+        if "regions" in data.files:
+            regions = data["regions"]
+        else:
+            centered = vertices - vertices.mean(axis=0)
+            regions = _assign_regions(centered / np.abs(centered).max(axis=0))
+        return vertices, np.asarray(data["faces"]), np.asarray(regions)
+    return generate_brain_mesh()
+
+def _assign_regions(unit):
+    # Regions by position in a unit-scaled brain frame
+    x, y, z = unit.T
+    regions = np.zeros(len(unit), dtype=np.uint8)
+    lateral_low = (z < -0.1) & (np.abs(x) > 0.5)
+    regions[y > 0.55] = 1
+    regions[lateral_low & (y > 0.05) & (y < 0.4)] = 2
+    regions[lateral_low & (y > -0.35) & (y <= 0.05)] = 3
+    return regions
+
+def _lod_prefix(directory, lod, mesh_file):
+    return os.path.join(directory, f"{lod}_v{MESH_VERSION}_{_source_tag(mesh_file)}")
+
+def _read_lod(lod, mesh_file):
+    # Shipped LODs only exist for the procedural mesh; a build in CACHE_DIR wins
+    directories = [CACHE_DIR] if mesh_file else [CACHE_DIR, LOD_DIR]
+    for directory in directories:
+        prefix = _lod_prefix(directory, lod, mesh_file)
+        try:
+            return tuple(np.load(f"{prefix}_{part}.npy", mmap_mode="r") for part in MESH_PARTS)
+        except (OSError, ValueError):
+            continue
+    return None
+
+def _source_tag(mesh_file):
+    if not mesh_file:
+        return "procedural"
+    st = os.stat(mesh_file)
+    key = f"{os.path.abspath(mesh_file)}:{st.st_size}:{st.st_mtime_ns}"
+    return hashlib.blake2b(key.encode(), digest_size=8).hexdigest()
+
+def _cluster(vertices, faces, regions, cell):
+    keys = np.floor((vertices - vertices.min(axis=0)) / cell).astype(np.int64)
+    _, first, cluster = np.unique(keys, axis=0, return_index=True, return_inverse=True)
+    cluster = cluster.ravel()
+    counts = np.bincount(cluster).astype(np.float64)
+    merged = np.stack([np.bincount(cluster, weights=vertices[:, i]) for i in range(3)], axis=1) / counts[:, None]
+    new_faces = cluster[faces]
+    a, b, c = new_faces.T
+    new_faces = new_faces[(a != b) & (b != c) & (a != c)]
+    # Drop faces that collapsed onto the same triangle
+    _, keep = np.unique(np.sort(new_faces, axis=1), axis=0, return_index=True)
+    new_faces = new_faces[np.sort(keep)]
+    return merged, new_faces, regions[first]
+
+def _icosphere(subdivisions):
+    t = (1 + 5 ** 0.5) / 2
+    vertices = np.array([
+        [-1, t, 0], [1, t, 0], [-1, -t, 0], [1, -t, 0],
+        [0, -1, t], [0, 1, t], [0, -1, -t], [0, 1, -t],
+        [t, 0, -1], [t, 0, 1], [-t, 0, -1], [-t, 0, 1],
+    ], dtype=np.float64)
+    vertices /= np.linalg.norm(vertices, axis=1, keepdims=True)
+    faces = np.array([
+        [0, 11, 5], [0, 5, 1], [0, 1, 7], [0, 7, 10], [0, 10, 11],
+        [1, 5, 9], [5, 11, 4], [11, 10, 2], [10, 7, 6], [7, 1, 8],
+        [3, 9, 4], [3, 4, 2], [3, 2, 6], [3, 6, 8], [3, 8, 9],
+        [4, 9, 5], [2, 4, 11], [6, 2, 10], [8, 6, 7], [9, 8, 1],
+    ])
+    for _ in range(subdivisions):
+        edges = np.sort(np.concatenate([faces[:, [0, 1]], faces[:, [1, 2]], faces[:, [2, 0]]]), axis=1)
+        unique_edges, edge_index = np.unique(edges, axis=0, return_inverse=True)
+        midpoints = vertices[unique_edges[:, 0]] + vertices[unique_edges[:, 1]]
+        midpoints /= np.linalg.norm(midpoints, axis=1, keepdims=True)
+        ab, bc, ca = (edge_index.ravel().reshape(3, -1) + len(vertices))
+        a, b, c = faces.T
+        faces = np.concatenate([
+            np.stack([a, ab, ca], axis=1), np.stack([b, bc, ab], axis=1),
+            np.stack([c, ca, bc], axis=1), np.stack([ab, bc, ca], axis=1),
+        ])
+        vertices = np.vstack([vertices, midpoints])
+    return vertices, faces
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Precompute cortex mesh LODs.")
+    parser.add_argument("--lods", nargs="+", choices=list(LOD_TARGET_FACES), default=list(LOD_TARGET_FACES))
+    parser.add_argument("--mesh-file", default=MESH_FILE, help="vertices/faces .npz (default: procedural cortex)")
+    parser.add_argument("--out-dir", default=None, help=f"output directory (default: {CACHE_DIR})")
+    args = parser.parse_args(argv)
+    for path in build_lods(args.lods, args.mesh_file, args.out_dir):
+        print(path)
+
+if __name__ == "__main__":
+    main()
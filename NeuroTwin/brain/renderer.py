@@ -1,27 +1,75 @@
+import functools
 import plotly.graph_objects as go
-import numpy as np
+from brain import mesh
+from brain.spec import brain_spec
+
+# Bump when the figure layout changes so cached figures are not reused across versions
+RENDERER_VERSION = 1
+CACHE_SIZE = 256
+
+def quantize_risk(risk):
+    # Figures only differ at 0.1% resolution, which is also what the title shows
+    return round(float(risk), 1)
 
 def render_brain(risk):
+    # Returns a shared cached figure; copy it (go.Figure(fig)) before mutating
+    return _build_figure(quantize_risk(risk), RENDERER_VERSION)
+
+def render_brain_mesh(risk, lod="medium"):
+    # Anatomical Mesh3d view over the fixed, precomputed LOD geometry; pick lod
+    # with mesh.choose_lod(viewport_width, client). Keep the figure and call
+    # recolor_brain_mesh when the risk changes instead of building a new one.
+    vertices, faces, _ = mesh.load_lod(lod)
+    fig = go.Figure(data=[go.Mesh3d(
+        x=vertices[:, 0], y=vertices[:, 1], z=vertices[:, 2],
+        i=faces[:, 0], j=faces[:, 1], k=faces[:, 2],
+        intensitymode='vertex',
+        colorscale='YlOrRd',
+        cmin=0, cmax=100,
+        hovertemplate='Activity: %{intensity:.0f}%<extra></extra>',
+        colorbar=dict(title='Activity %'),
+        flatshading=False,
+        lighting=dict(ambient=0.5, diffuse=0.8, specular=0.2),
+    )])
+    fig.update_layout(
+        scene=dict(
+            xaxis_title='Left ← → Right',
+            yaxis_title='Back ← → Front',
+            zaxis_title='Bottom ← → Top',
+            aspectmode='data'
+        ),
+        height=600
+    )
+    return recolor_brain_mesh(fig, risk, lod)
+
+def recolor_brain_mesh(fig, risk, lod="medium"):
+    # In place: only the vertex intensities and the title follow the risk
+    fig.plotly_restyle(mesh_color_update(risk, lod), trace_indexes=[0])
+    fig.update_layout(title=f"Brain Digital Twin | Depression Risk: {quantize_risk(risk):g}%")
+    return fig
+
+def mesh_color_update(risk, lod="medium"):
+    # Plotly.restyle payload for a client that already holds the geometry
+    return {"intensity": [mesh.vertex_intensity(quantize_risk(risk), lod)]}
+
+def cache_info():
+    return {"figure": _build_figure.cache_info()}
+
+@functools.lru_cache(maxsize=CACHE_SIZE)
+def _build_figure(risk, version):
     # 3D brain with amygdala (anxiety), hippocampus (memory), prefrontal (control)
-    regions = ["Prefrontal", "Amygdala", "Hippocampus"]
-    x = [0, 1, 2]
-    y = [0, 1, 0]
-    z = [0, 0, 1]
-    colors = ['green', 'red' if risk > 70 else 'yellow', 'blue']
-    sizes = [15, 25 if risk > 70 else 18, 12]
-    
-    hovertext = [f"{r}<br>Activity: {100-risk if r=='Amygdala' else risk}%" for r in regions]
+    regions = brain_spec(risk)["regions"]
     fig = go.Figure(data=[go.Scatter3d(
-        x=x, y=y, z=z,
+        x=[r["x"] for r in regions], y=[r["y"] for r in regions], z=[r["z"] for r in regions],
         mode='markers+text+lines',
-        marker=dict(size=sizes, color=colors),
-        text=regions,
+        marker=dict(size=[r["size"] for r in regions], color=[r["color"] for r in regions]),
+        text=[r["name"] for r in regions],
         textposition="top center",
-        hovertext=hovertext,
+        hovertext=[f"{r['name']}<br>Activity: {r['activity']:g}%" for r in regions],
         line=dict(color='gray', width=3)
     )])
     fig.update_layout(
-        title=f"Brain Digital Twin | Depression Risk: {risk}%",
+        title=f"Brain Digital Twin | Depression Risk: {risk:g}%",
         scene=dict(
             xaxis_title='Left ← → Right',
             yaxis_title='Front ← → Back',
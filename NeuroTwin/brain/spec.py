@@ -0,0 +1,18 @@
+# Renderer-neutral description of the three-region brain view: plain
+# Python data, no plotly, so headless callers (core, service, reports) can
+# ship it as JSON and any front end can draw it.
+RISK_THRESHOLD = 70
+REGION_NAMES = ["Prefrontal", "Amygdala", "Hippocampus"]
+POSITIONS = [(0, 0, 0), (1, 1, 0), (2, 0, 1)]
+
+def brain_spec(risk):
+    risk = round(float(risk), 1)
+    alert = risk > RISK_THRESHOLD
+    colors = ['green', 'red' if alert else 'yellow', 'blue']
+    sizes = [15, 25 if alert else 18, 12]
+    regions = []
+    for name, (x, y, z), color, size in zip(REGION_NAMES, POSITIONS, colors, sizes):
+        # Amygdala carries the anxiety signal, shown as the complement of risk
+        activity = round(100 - risk, 1) if name == "Amygdala" else risk
+        regions.append({"name": name, "x": x, "y": y, "z": z, "color": color, "size": size, "activity": activity})
+    return {"risk": risk, "alert": alert, "threshold": RISK_THRESHOLD, "regions": regions}
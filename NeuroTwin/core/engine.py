@@ -0,0 +1,91 @@
+import numpy as np
+import pandas as pd
+from brain.mesh import choose_lod
+from brain.spec import brain_spec
+from predictor.models import load_model, sequence_tensor
+from predictor.risk import expected_risk
+from predictor.trend import CHART_WIDTHS, DEFAULT_WIDTH, build_trend, points_for_width
+from twin.diary import Diary
+from twin.enrich import NOTE_COLUMN
+from twin.heatmap import build_heatmap
+from twin.registry import get_registry
+
+# Headless NeuroTwin pipeline shared by both dashboards: ingestion, risk,
+# trend, heatmap and brain render specs. Nothing here imports Streamlit (or
+# plotly, until a figure is asked for), so every hot path can be profiled,
+# benchmarked and reused from plain Python.
+
+def ingest_upload(payload, data_dir=None):
+    # (content digest, typed frame); parsed once per unique upload, ValueError if malformed.
+    # data_dir persists it to the Parquet store under the digest (twin.store.load_upload)
+    return get_registry().upload_frame(payload, data_dir=data_dir)
+
+def upload_twin(payload, window=7, data_dir=None):
+    return get_registry().upload(payload, window=window, data_dir=data_dir)
+
+def diary_twin(path, window=7, **load_kwargs):
+    return get_registry().twin(path, window=window, **load_kwargs)
+
+def new_diary(frame=None):
+    return Diary() if frame is None else Diary.from_frame(frame)
+
+def risk_summary(source):
+    # A Diary serves its cached summary, so unchanged diaries (theme-only reruns)
+    # skip the means; a bare frame is computed directly
+    if isinstance(source, Diary):
+        return source.derived("risk", lambda: _summarize(source.frame()))
+    return _summarize(source)
+
+def _summarize(frame):
+    # Noise-free risk from the diary means, rounded like the dashboards show it
+    if len(frame) == 0:
+        return {"risk": 0.0, "avg_stress": 0.0, "avg_sleep": 0.0, "note_distress": 0.0, "entries": 0}
+    avg_stress = float(pd.to_numeric(frame["stress"], errors="coerce").mean())
+    avg_sleep = float(pd.to_numeric(frame["sleep_hours"], errors="coerce").mean())
+    note_distress = float(frame[NOTE_COLUMN].mean()) if NOTE_COLUMN in frame.columns else 0.0
+    if np.isnan(avg_stress) or np.isnan(avg_sleep):
+        return {"risk": 0.0, "avg_stress": 0.0, "avg_sleep": 0.0, "note_distress": 0.0, "entries": len(frame)}
+    risk = round(float(expected_risk(avg_stress, avg_sleep, note_distress)), 1)
+    return {"risk": risk, "avg_stress": avg_stress, "avg_sleep": avg_sleep,
+            "note_distress": note_distress, "entries": len(frame)}
+
+def model_risk(frames, name=None, path=None, days=90):
+    # One risk per diary from a registered sequence model; name/path default to
+    # NEUROTWIN_RISK_MODEL / NEUROTWIN_RISK_WEIGHTS
+    model = load_model(name, path)
+    x, lengths = sequence_tensor(frames, days)
+    return model.predict(x, lengths)
+
+def trend(source, freq="auto", points=None, window=None, width=None):
+    # A Diary serves its cached series; a bare frame is computed directly.
+    # width (chart pixels) sets the point budget unless points is given
+    if points is None and width is not None:
+        points = points_for_width(width)
+    if isinstance(source, Diary):
+        return source.trend(freq=freq, points=points, window=window)
+    return build_trend(source, freq=freq, points=points, window=window)
+
+def heatmap(source, weeks=1, column="stress"):
+    if isinstance(source, Diary):
+        return source.heatmap(weeks=weeks, column=column)
+    return build_heatmap(source["date"], source[column], weeks=weeks)
+
+def render_spec(risk):
+    return brain_spec(risk)
+
+def mesh_lod(width):
+    # Finest built mesh LOD worth drawing at this chart width (px)
+    return choose_lod(viewport_width=width)
+
+def brain_figure(risk, view="regions", lod="medium"):
+    # Plotly figure (the regions view is cached); plotly is only imported here.
+    # Mesh figures are per caller: keep one and pass it to recolor_mesh on risk changes
+    from brain.renderer import render_brain, render_brain_mesh
+    if view == "mesh":
+        return render_brain_mesh(risk, lod=lod)
+    return render_brain(risk)
+
+def recolor_mesh(fig, risk, lod="medium"):
+    # Restyles only the vertex colours of a mesh figure from brain_figure(view="mesh")
+    from brain.renderer import recolor_brain_mesh
+    return recolor_brain_mesh(fig, risk, lod=lod)
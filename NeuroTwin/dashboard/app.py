@@ -1,11 +1,56 @@
 import streamlit as st
-import pandas as pd
-import numpy as np
 import os
 import sys
+import hashlib
 sys.path.append(os.path.dirname(os.path.dirname(__file__)))
-from brain.renderer import render_brain
-from twin.builder import DigitalTwin
+from core import engine
+from report.worker import get_report_worker
+from voice.analysis import WARMUP_ON_START, get_voice_analyzer
+from voice.text_tone import detect_tone
+
+VOICE_POLL_SECONDS = 0.5
+REPORT_POLL_SECONDS = 1.0
+
+def report_panel(pending):
+    job = st.session_state.report_job
+    if not job.done():
+        st.info("⏳ Rendering report with 3D brain snapshot...")
+        return
+    if pending:
+        # Full rerun so the panel is drawn again without the polling timer
+        st.rerun()
+    if job.error is not None:
+        st.error(f"Export failed: {job.error}")
+    else:
+        st.download_button("📥 Download Full Report", job.result(), "NeuroTwin_Report.pdf", "application/pdf")
+
+def voice_tone_panel(clip_key):
+    voice_results = st.session_state.voice_results
+    if clip_key not in voice_results:
+        job = st.session_state.voice_jobs[clip_key]
+        if not job.done():
+            # Long journals report a provisional tone block by block
+            partial = job.poll()
+            if partial is None:
+                st.info("🎙️ Analyzing voice tone...")
+            else:
+                st.info(f"⏳ {partial['duration']:.0f}s analyzed | provisional tone: {partial['tone'].upper()}")
+            return
+        del st.session_state.voice_jobs[clip_key]
+        if job.error is not None:
+            st.error(f"Voice analysis failed: {job.error}")
+            return
+        voice_results[clip_key] = job.result()
+        # Full rerun so the panel is drawn again without the polling timer
+        st.rerun()
+    tone = voice_results[clip_key]["tone"]
+    st.write(f"🔊 Detected tone: **{tone.upper()}**")
+    if tone == "anxious":
+        st.error("⚠️ Voice confirms high stress!")
+    elif tone == "calm":
+        st.success("✓ Voice analysis shows calm demeanor")
+    else:
+        st.warning("⚠️ Voice suggests depressed mood")
 
 def run_dashboard(twin=None):
     st.set_page_config(page_title="NeuroTwin", layout="wide", page_icon="brain")
@@ -17,17 +62,30 @@ def run_dashboard(twin=None):
     if uploaded:
         # Determine the correct data directory
         data_dir = "data" if os.path.isdir("data") else "NeuroTwin/data"
-        path = f"{data_dir}/uploaded_{uploaded.name}"
-        os.makedirs(data_dir, exist_ok=True)
-        with open(path, "wb") as f:
-            f.write(uploaded.getbuffer())
-        twin = DigitalTwin(path)
+        # Parsed once per unique file content and kept in the Parquet store under
+        # its digest; reruns only hash the bytes, a new process reloads the Parquet copy
+        try:
+            digest, twin = engine.upload_twin(uploaded.getvalue(), data_dir=data_dir)
+        except ValueError as e:
+            st.error(str(e))
+            st.stop()
+        if st.session_state.get('upload_digest') != digest:
+            # A different diary replaces the session twin
+            st.session_state.upload_digest = digest
+            st.session_state.pop('twin', None)
     elif twin is None:
         # Determine the correct path to sample data
         sample_path = "data/sample_mood_log.csv" if os.path.isfile("data/sample_mood_log.csv") else "NeuroTwin/data/sample_mood_log.csv"
-        twin = DigitalTwin(sample_path)
+        twin = engine.diary_twin(sample_path)
         st.info("Using sample data. Upload your own for personalized twin.")
 
+    if 'twin' not in st.session_state:
+        twin.aggregate()
+        st.session_state.twin = twin
+        # One copy of the diary per session; live entries are appended in place and
+        # everything derived from it is cached per diary revision
+        st.session_state.diary = engine.new_diary(twin.df)
+
     with st.expander("Panel: Enter Mood Live (No CSV)"):
         with st.form("live_mood"):
             mood = st.selectbox("Mood", ["happy", "neutral", "anxious", "depressed"])
@@ -37,37 +95,26 @@ def run_dashboard(twin=None):
             submit = st.form_submit_button("Update My Brain")
 
             if submit:
-                new_row = pd.DataFrame([{
-                    "date": pd.Timestamp.now().strftime("%Y-%m-%d"),
-                    "mood": mood,
-                    "stress": stress,
-                    "sleep_hours": sleep,
-                    "notes": note
-                }])
-                if 'live_df' not in st.session_state:
-                    st.session_state.live_df = new_row
-                else:
-                    st.session_state.live_df = pd.concat([st.session_state.live_df, new_row], ignore_index=True)
+                st.session_state.diary.append(stress, sleep, mood=mood, notes=note)
                 st.success("Mood added! Brain updating...")
                 st.rerun()
 
-    if 'twin' not in st.session_state:
-        twin.build()
-        st.session_state.twin = twin
-
-    twin = st.session_state.twin
-    risk = twin.predict_depression()
+    diary = st.session_state.diary
+    df = diary.frame()
+    # Same noise-free engine risk as app_run.py, over the diary including live entries
+    summary = engine.risk_summary(diary)
+    risk = summary["risk"]
 
     # === AFTER RISK CALCULATION ===
-    df = twin.df.copy()
-    if 'live_df' in st.session_state:
-        df = pd.concat([df, st.session_state.live_df], ignore_index=True)
+
+    # The chart width (px) sets the trend's LTTB point budget and the brain mesh LOD
+    chart_width = st.sidebar.select_slider("Chart width (px)", engine.CHART_WIDTHS, value=engine.DEFAULT_WIDTH)
 
     # Trend chart
     if df is not None and len(df) > 1:
-        trend_df = df.copy()
-        trend_df['risk'] = trend_df.apply(lambda row: np.clip(40 + row['stress']*8.51 - row['sleep_hours']*3.8, 0, 100), axis=1)
-        st.line_chart(trend_df.set_index('date')['risk'], width='stretch')
+        resolution = st.radio("Trend resolution", ["auto", "day", "week", "month"], horizontal=True)
+        # Resampled and downsampled once per diary revision and width
+        st.line_chart(engine.trend(diary, freq=resolution, width=chart_width), width=chart_width)
         st.caption("Risk Trend Over Time")
 
     # Therapy recommendation
@@ -88,20 +135,31 @@ def run_dashboard(twin=None):
         st.warning("Please contact a therapist or emergency services immediately.")
 
     with col2:
-        fig = render_brain(risk)
+        view = st.radio("Brain view", ["Regions", "Cortex mesh"], horizontal=True)
+        if view == "Regions":
+            fig = engine.brain_figure(risk)
+        else:
+            lod = engine.mesh_lod(chart_width)
+            if st.session_state.get('mesh_lod') != lod:
+                # Geometry is built once per session and LOD; risk changes only restyle the vertex colours
+                st.session_state.mesh_fig = engine.brain_figure(risk, view="mesh", lod=lod)
+                st.session_state.mesh_lod = lod
+                fig = st.session_state.mesh_fig
+            else:
+                fig = engine.recolor_mesh(st.session_state.mesh_fig, risk, lod=lod)
         st.plotly_chart(fig, width='stretch')
 
     with st.expander("View Your Mood Data"):
-        st.write(twin.df.to_string())
+        st.write(diary.to_string())
 
     # Full report export
     if st.button("📄 Export Full Report (PNG + 3D Brain)"):
-        try:
-            # Save brain as PNG
-            fig.write_image("brain_snapshot.png")
-            st.success("✓ Full report with 3D brain saved as brain_snapshot.png!")
-        except Exception as e:
-            st.error(f"Export failed: {str(e)}")
+        # Snapshot and PDF are rendered in memory on the background report pool
+        st.session_state.report_job = get_report_worker().submit(risk, summary["avg_stress"], summary["avg_sleep"], fig)
+    if 'report_job' in st.session_state:
+        # While the job runs, only this fragment reruns to poll it
+        pending = not st.session_state.report_job.done()
+        st.fragment(report_panel, run_every=REPORT_POLL_SECONDS if pending else None)(pending)
 
     st.subheader("Voice Tone Analysis")
     col_audio, col_text = st.columns(2)
@@ -109,59 +167,32 @@ def run_dashboard(twin=None):
         audio_data = st.audio_input("🎤 Record your voice for tone analysis")
         if audio_data:
             st.audio(audio_data, format="audio/wav")
-            st.info("🎙️ Analyzing voice tone...")
-            with st.spinner("Processing audio..."):
-                import io
-                import librosa
-                import soundfile as sf
-                # Convert audio bytes to numpy array
-                audio_bytes = audio_data.getvalue()
-                audio_array, sample_rate = sf.read(io.BytesIO(audio_bytes))
-                # Extract features
-                mfccs = librosa.feature.mfcc(y=audio_array, sr=sample_rate, n_mfcc=13)
-                chroma = librosa.feature.chroma_stft(y=audio_array, sr=sample_rate)
-                spectral_centroid = librosa.feature.spectral_centroid(y=audio_array, sr=sample_rate)
-                # Simple heuristic: higher pitch/energy might indicate anxiety
-                avg_mfcc = np.mean(mfccs)
-                avg_chroma = np.mean(chroma)
-                avg_centroid = np.mean(spectral_centroid)
-                # Mock analysis based on features
-                if avg_centroid > 2000 or avg_mfcc > 0:
-                    tone = "anxious"
-                elif avg_chroma > 0.5:
-                    tone = "calm"
-                else:
-                    tone = "depressed"
-            st.write(f"🔊 Detected tone: **{tone.upper()}**")
-            if tone == "anxious":
-                st.error("⚠️ Voice confirms high stress!")
-            elif tone == "calm":
-                st.success("✓ Voice analysis shows calm demeanor")
-            else:
-                st.warning("⚠️ Voice suggests depressed mood")
+            # Analyzed in the shared voice worker pool; results are kept per recording
+            # so reruns with the same clip do not re-analyze it
+            audio_bytes = audio_data.getvalue()
+            clip_key = hashlib.blake2b(audio_bytes, digest_size=16).hexdigest()
+            voice_results = st.session_state.setdefault('voice_results', {})
+            voice_jobs = st.session_state.setdefault('voice_jobs', {})
+            if clip_key not in voice_results and clip_key not in voice_jobs:
+                voice_jobs[clip_key] = get_voice_analyzer().analyze(audio_bytes)
+            # While the worker runs, only this fragment reruns to poll it
+            pending = clip_key not in voice_results
+            st.fragment(voice_tone_panel, run_every=VOICE_POLL_SECONDS if pending else None)(clip_key)
     with col_text:
         st.markdown("**Or type what you'd say:**")
         voice_text = st.text_input("Type your voice input here", placeholder="e.g., I'm feeling really stressed today...")
         if st.button("Analyze Text Tone"):
             if voice_text.strip():
-                st.info("📝 Analyzing text tone...")
-                with st.spinner("Processing text..."):
-                    import time
-                    time.sleep(0.5)
-                # Mock result based on text content
-                if "stressed" in voice_text.lower() or "anxious" in voice_text.lower():
-                    tone = "anxious"
-                elif "calm" in voice_text.lower() or "happy" in voice_text.lower():
-                    tone = "calm"
-                else:
-                    tone = np.random.choice(["anxious", "calm", "depressed"])
+                tone = detect_tone(voice_text)
                 st.write(f"🔊 Detected tone: **{tone.upper()}**")
                 if tone == "anxious":
                     st.error("⚠️ Text suggests high stress!")
                 elif tone == "calm":
                     st.success("✓ Text analysis shows calm demeanor")
-                else:
+                elif tone == "depressed":
                     st.warning("⚠️ Text suggests depressed mood")
+                else:
+                    st.info("Text tone appears neutral")
             else:
                 st.warning("Please enter some text to analyze.")
 
@@ -169,27 +200,24 @@ def run_dashboard(twin=None):
 
     # === 9. MOOD TREND HEATMAP ===
     if len(df) > 1:
-        st.subheader("Mood & Stress Heatmap (Last 7 Days)")
-        df_heatmap = df.copy()
-        df_heatmap['date'] = pd.to_datetime(df_heatmap['date'])
-        df_heatmap = df_heatmap.set_index('date').tail(7)
-
-        # Create pivot: days x stress
-        heatmap_data = df_heatmap.pivot_table(
-            values='stress', index=df_heatmap.index.day_name(),
-            columns=df_heatmap.index.date, aggfunc='mean', fill_value=0
-        )
-        heatmap_data = heatmap_data.reindex(['Monday','Tuesday','Wednesday','Thursday','Friday','Saturday','Sunday'])
-
-        import plotly.express as px
-        fig_heat = px.imshow(
-            heatmap_data.values,
-            labels=dict(x="Date", y="Day", color="Stress Level"),
-            x=[d.strftime('%b %d') for d in heatmap_data.columns],
-            y=heatmap_data.index,
-            color_continuous_scale="Reds",
-            text_auto=True
-        )
+        st.subheader("Mood & Stress Heatmap")
+        span = st.select_slider("Heatmap window", ["1 week", "4 weeks", "13 weeks", "52 weeks"], value="1 week")
+        weeks = int(span.split()[0])
+        heatmap = engine.heatmap(diary, weeks=weeks)
+
+        # go.Heatmap instead of px.imshow: plotly.express alone adds ~250 ms to a cold start
+        import plotly.graph_objects as go
+        fig_heat = go.Figure(go.Heatmap(
+            z=heatmap.values,
+            x=[d.strftime('%b %d') for d in heatmap.week_starts],
+            y=heatmap.weekdays,
+            colorscale="Reds",
+            colorbar=dict(title="Stress Level"),
+            texttemplate="%{z:.1f}" if weeks <= 4 else None,
+            hovertemplate="Week of %{x}<br>%{y}: %{z:.1f}<extra></extra>",
+        ))
+        fig_heat.update_yaxes(autorange="reversed", title="Day")
+        fig_heat.update_xaxes(title="Week of", type="category")
         fig_heat.update_layout(height=300, margin=dict(t=30, b=0))
         st.plotly_chart(fig_heat, use_container_width=True)
 
@@ -207,15 +235,13 @@ def run_dashboard(twin=None):
 
     # === 11. SLEEP DEBT TRACKER ===
     if len(df) > 0:
-        total_sleep = df['sleep_hours'].sum()
-        expected_sleep = len(df) * 7.5
-        sleep_debt = expected_sleep - total_sleep
+        sleep_debt = diary.sleep_debt()
         debt_color = "inverse" if sleep_debt > 0 else "normal"
         st.metric("**Sleep Debt**", f"{sleep_debt:+.1f} hrs", delta=f"vs {len(df)}×7.5 hrs ideal")
 
     # === 12. EXPORT TO CSV ===
     if st.button("📥 Export Diary to CSV"):
-        csv = df.to_csv(index=False).encode()
+        csv = diary.to_csv()
         st.download_button(
             "Download Mood Diary",
             csv,
@@ -238,6 +264,13 @@ def run_dashboard(twin=None):
     st.sidebar.image("https://img.icons8.com/fluency/48/000000/brain.png", width=60)
     st.sidebar.markdown("### NeuroTwin v1.0")
     st.sidebar.markdown(f"**Risk:** {risk}% | **Entries:** {len(df)}")
+    cache = diary.cache.stats()
+    st.sidebar.caption(f"Derived cache: {cache['hit_rate']:.0%} hits ({cache['hits']}/{cache['hits'] + cache['misses']})")
+
+    # Voice workers (librosa, numba) spin up once per process after the first
+    # render, so they never delay it but are warm before the first recording
+    if WARMUP_ON_START:
+        get_voice_analyzer()
 
 if __name__ == "__main__":
     run_dashboard()
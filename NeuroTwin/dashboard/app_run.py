@@ -1,16 +1,31 @@
 import streamlit as st
 import pandas as pd
-import numpy as np
-import plotly.graph_objects as go
-try:
-    import pyttsx3
-    TTS_AVAILABLE = True
-except ImportError:
-    TTS_AVAILABLE = False
-from fpdf import FPDF  # Fixed import
-import streamlit.components.v1 as components
 from datetime import datetime
+import importlib.util
 import os
+import sys
+# Optional subsystems load on first use: pyttsx3 probes audio drivers on import
+TTS_AVAILABLE = importlib.util.find_spec("pyttsx3") is not None
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+from report.worker import get_report_worker
+from core import engine
+from voice.text_tone import detect_tone
+
+REPORT_POLL_SECONDS = 1.0
+
+def report_panel(pending):
+    job = st.session_state.report_job
+    if not job.done():
+        st.info("⏳ Generating PDF report...")
+        return
+    if pending:
+        # Full rerun so the panel is drawn again without the polling timer
+        st.rerun()
+    if job.error is not None:
+        st.error(f"PDF error: {job.error}")
+    else:
+        st.download_button("📥 Download PDF Report", job.result(), "NeuroTwin_Report.pdf", "application/pdf")
+        st.success("✅ PDF ready to download!")
 
 # Page Config
 st.set_page_config(page_title="NeuroTwin", layout="wide", page_icon="🧠")
@@ -18,8 +33,9 @@ st.markdown("# 🧠 NeuroTwin: Your Personal Brain Digital Twin")
 st.markdown("**Upload CSV → Speak → See 3D Brain → Get Crisis Alert**")
 
 # Initialize Session State
-if 'df' not in st.session_state:
-    st.session_state.df = pd.DataFrame(columns=["date", "mood", "stress", "sleep_hours", "notes"])
+if 'diary' not in st.session_state:
+    # Append-only diary; derived charts are cached per diary revision
+    st.session_state.diary = engine.new_diary()
 if 'risk' not in st.session_state:
     st.session_state.risk = 0
 
@@ -28,16 +44,15 @@ uploaded_file = st.file_uploader("**Upload Mood Diary (CSV)**", type=['csv'])
 
 if uploaded_file is not None:
     try:
-        df_upload = pd.read_csv(uploaded_file)
-        required_cols = ["date", "mood", "stress", "sleep_hours"]
-        if not all(col in df_upload.columns for col in required_cols):
-            st.error("CSV must have: date, mood, stress, sleep_hours")
-        else:
-            st.session_state.df = df_upload[required_cols + ["notes"] if "notes" in df_upload.columns else required_cols].copy()
-            st.success(f"Loaded {len(st.session_state.df)} entries!")
+        # Parsed and validated once per unique file content; reruns only hash the bytes
+        digest, df_upload = engine.ingest_upload(uploaded_file.getvalue())
+        if st.session_state.get('upload_digest') != digest:
+            st.session_state.upload_digest = digest
+            st.session_state.diary = engine.new_diary(df_upload)
+            st.success(f"Loaded {len(st.session_state.diary)} entries!")
             st.rerun()
-    except Exception as e:
-        st.error(f"Invalid CSV: {e}")
+    except ValueError as e:
+        st.error(str(e))
 
 # === 2. LIVE MOOD FORM ===
 with st.expander("**Or Enter Mood Live**"):
@@ -52,19 +67,12 @@ with st.expander("**Or Enter Mood Live**"):
         submit = st.form_submit_button("Add to Diary")
 
         if submit:
-            new_row = pd.DataFrame([{
-                "date": datetime.now().strftime("%Y-%m-%d"),
-                "mood": mood,
-                "stress": stress,
-                "sleep_hours": sleep,
-                "notes": note
-            }])
-            st.session_state.df = pd.concat([st.session_state.df, new_row], ignore_index=True)
+            st.session_state.diary.append(stress, sleep, mood=mood, date=datetime.now().strftime("%Y-%m-%d"), notes=note)
             st.success("Mood added! Brain updating...")
             st.rerun()
 
 # === 3. DATAFRAME (Always Use Session State) ===
-df = st.session_state.df
+df = st.session_state.diary.frame()
 if df.empty:
     df = pd.DataFrame({
         "date": ["2025-11-08", "2025-11-09"],
@@ -79,42 +87,13 @@ else:
     st.dataframe(df, use_container_width=True)
 
 # === 4. RISK CALCULATION ===
-def calculate_risk(df):
-    try:
-        avg_stress = df['stress'].mean()
-        avg_sleep = df['sleep_hours'].mean()
-        risk = np.clip(40 + (avg_stress * 6.2) - (avg_sleep * 3.8), 0, 100)
-        return round(risk, 1), avg_stress, avg_sleep
-    except:
-        return 0, 0, 0
-
-risk, avg_stress, avg_sleep = calculate_risk(df)
+# The diary caches its summary per revision; the sample frame is scored directly
+summary = engine.risk_summary(st.session_state.diary if len(st.session_state.diary) else df)
+risk, avg_stress, avg_sleep = summary["risk"], summary["avg_stress"], summary["avg_sleep"]
 st.session_state.risk = risk
 
-# === 5. 3D BRAIN RENDERER ===
-def render_brain(risk):
-    regions = ["Prefrontal Cortex", "Amygdala (Anxiety)", "Hippocampus"]
-    x, y, z = [0, 1, 2], [0, 1, 0], [0, 0, 1]
-    colors = ['green', 'red' if risk > 70 else 'yellow', 'blue']
-    sizes = [15, 28 if risk > 70 else 20, 14]
-    
-    fig = go.Figure(data=[go.Scatter3d(
-        x=x, y=y, z=z,
-        mode='markers+text+lines',
-        marker=dict(size=sizes, color=colors),
-        text=regions,
-        textposition="top center",
-        line=dict(color='gray', width=3),
-        hovertemplate='<b>%{text}</b><br>Risk: %{customdata:.1f}%<extra></extra>',
-        customdata=[risk*0.3, risk, risk*0.5]
-    )])
-    fig.update_layout(
-        title=f"Brain Activity | Risk: {risk}%",
-        scene=dict(xaxis_title='', yaxis_title='', zaxis_title=''),
-        height=500,
-        margin=dict(l=0, r=0, b=0, t=40)
-    )
-    return fig
+# === 5. 3D BRAIN (shared, cached figure from the core engine) ===
+fig = engine.brain_figure(risk)
 
 # === 6. LAYOUT ===
 col1, col2 = st.columns([1, 2])
@@ -129,9 +108,10 @@ with col1:
         if st.button("🔊 Play Voice Alert"):
             if TTS_AVAILABLE:
                 try:
-                    engine = pyttsx3.init()
-                    engine.say("Crisis detected. You are not alone. Contact a therapist now.")
-                    engine.runAndWait()
+                    import pyttsx3
+                    tts = pyttsx3.init()
+                    tts.say("Crisis detected. You are not alone. Contact a therapist now.")
+                    tts.runAndWait()
                     st.success("Alert played!")
                 except:
                     st.warning("Voice not supported. Text alert shown.")
@@ -143,32 +123,15 @@ with col1:
         st.success("Low Risk: Keep it up!")
 
     if st.button("📄 Export Full Report (PDF)"):
-        try:
-            fig = render_brain(risk)
-            fig.write_image("brain.png")
-            
-            pdf = FPDF()
-            pdf.add_page()
-            pdf.set_font("Arial", 'B', 16)
-            pdf.cell(0, 10, "NeuroTwin Report", ln=1, align='C')
-            pdf.ln(8)
-            pdf.set_font("Arial", size=12)
-            pdf.cell(0, 10, f"Risk Level: {risk}%", ln=1)
-            pdf.cell(0, 10, f"Average Stress: {avg_stress:.1f}/10", ln=1)
-            pdf.cell(0, 10, f"Average Sleep: {avg_sleep:.1f} hours", ln=1)
-            pdf.ln(5)
-            pdf.set_font("Arial", 'I', 10)
-            pdf.multi_cell(0, 5, f"Generated on {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-            pdf.output("NeuroTwin_Report.pdf")
-            
-            with open("NeuroTwin_Report.pdf", "rb") as f:
-                st.download_button("📥 Download PDF Report", f.read(), "NeuroTwin_Report.pdf", "application/pdf")
-            st.success("✅ PDF ready to download!")
-        except Exception as e:
-            st.error(f"PDF error: {e}")
+        # Rendered on the background report pool; this rerun returns immediately
+        st.session_state.report_job = get_report_worker().submit(risk, avg_stress, avg_sleep, fig)
+
+    if 'report_job' in st.session_state:
+        # While the job runs, only this fragment reruns to poll it
+        pending = not st.session_state.report_job.done()
+        st.fragment(report_panel, run_every=REPORT_POLL_SECONDS if pending else None)(pending)
 
 with col2:
-    fig = render_brain(risk)
     st.plotly_chart(fig, use_container_width=True)
 
 # === 7. SIMPLIFIED VOICE ANALYSIS (TEXT-BASED Fallback for Easy Testing) ===
@@ -178,16 +141,8 @@ with st.expander("🎙️ **Voice Analysis (Text Simulation for Demo)**"):
     speech_text = st.text_area("**Type what you'd say into the mic** (e.g., 'I'm feeling anxious')", "I'm happy today")
     if st.button("Analyze Speech"):
         if speech_text:
-            text_lower = speech_text.lower()
-            if any(word in text_lower for word in ["anxious", "sad", "depressed", "stress", "bad", "worried", "angry", "frustrated"]):
-                emotion = "anxious"
-                risk_level = "high"
-            elif any(word in text_lower for word in ["happy", "good", "great", "calm", "relaxed", "excited"]):
-                emotion = "happy"
-                risk_level = "low"
-            else:
-                emotion = "neutral"
-                risk_level = "moderate"
+            emotion = detect_tone(speech_text)
+            risk_level = {"anxious": "high", "depressed": "high", "calm": "low"}.get(emotion, "moderate")
 
             st.write(f"**Detected Emotion:** {emotion.upper()}")
             st.write(f"**Risk Level:** {risk_level.upper()}")
@@ -195,14 +150,8 @@ with st.expander("🎙️ **Voice Analysis (Text Simulation for Demo)**"):
             if risk_level == "high":
                 st.error("⚠️ Voice indicates high stress/anxiety")
                 # Add to mood data
-                new_entry = pd.DataFrame([{
-                    "date": datetime.now().strftime("%Y-%m-%d"),
-                    "mood": "anxious",
-                    "stress": 8.0,
-                    "sleep_hours": 5.0,
-                    "notes": f"Voice: {speech_text}"
-                }])
-                st.session_state.df = pd.concat([st.session_state.df, new_entry], ignore_index=True)
+                st.session_state.diary.append(8.0, 5.0, mood=emotion, date=datetime.now().strftime("%Y-%m-%d"),
+                                                notes=f"Voice: {speech_text}")
                 st.success("Mood data updated from voice!")
                 st.rerun()
             else:
@@ -212,11 +161,10 @@ with st.expander("🎙️ **Voice Analysis (Text Simulation for Demo)**"):
 
 # === 8. RISK TREND CHART ===
 if len(df) > 1:
-    trend_df = df.copy()
-    trend_df['daily_risk'] = trend_df.apply(
-        lambda row: np.clip(40 + row['stress']*6.2 - row['sleep_hours']*3.8, 0, 100), axis=1
-    )
     st.subheader("Risk Trend Over Time")
-    st.line_chart(trend_df.set_index('date')['daily_risk'])
+    # Drawn at a fixed pixel width so the LTTB point budget matches what is on screen
+    chart_width = st.sidebar.select_slider("Trend chart width (px)", engine.CHART_WIDTHS, value=engine.DEFAULT_WIDTH)
+    trend = engine.trend(st.session_state.diary if len(st.session_state.diary) else df, width=chart_width)
+    st.line_chart(trend.rename('daily_risk'), width=chart_width)
 
 st.sidebar.success("NeuroTwin Active | 100% Local")
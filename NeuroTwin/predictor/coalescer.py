@@ -0,0 +1,162 @@
+import bisect
+import threading
+import time
+from concurrent.futures import Future
+import numpy as np
+from predictor.risk import predict_depression_batch
+
+# Micro-batching front end for the risk model. Callers from any thread get a
+# Future; a single worker thread collects requests for up to max_wait_ms or
+# max_batch items and resolves them all from one vectorized predict call.
+#   coalescer = get_risk_coalescer()
+#   risk = coalescer.submit(avg_stress, avg_sleep).result()
+MAX_BATCH = 256
+MAX_WAIT_MS = 2.0
+BATCH_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512)
+WAIT_BUCKETS_MS = (0.1, 0.25, 0.5, 1, 2, 5, 10, 25, 50, 100)
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.total = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.total += value
+
+    def quantile(self, q):
+        # Upper bound of the bucket holding the q-th observation
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for bound, n in zip(self.buckets + (float("inf"),), self.counts):
+            seen += n
+            if seen >= rank:
+                return bound
+        return float("inf")
+
+    def snapshot(self):
+        labels = [f"le_{b:g}" for b in self.buckets] + ["le_inf"]
+        # JSON has no Infinity: quantiles past the last bucket report None
+        quantiles = {name: self.quantile(q) for name, q in (("p50", 0.5), ("p95", 0.95), ("p99", 0.99))}
+        return {
+            "count": self.count,
+            "mean": self.total / self.count if self.count else 0.0,
+            **{name: (None if v == float("inf") else v) for name, v in quantiles.items()},
+            "buckets": dict(zip(labels, self.counts)),
+        }
+
+class CoalescerFull(RuntimeError):
+    pass
+
+class RiskCoalescer:
+    # max_wait_ms bounds the latency a request can add while waiting for company,
+    # max_batch bounds the work per call, and max_pending (None = unbounded)
+    # rejects new requests with CoalescerFull instead of letting the queue grow.
+    def __init__(self, max_batch=MAX_BATCH, max_wait_ms=MAX_WAIT_MS, max_pending=None,
+                 predict=predict_depression_batch):
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self.max_pending = max_pending
+        self.batch_sizes = Histogram(BATCH_BUCKETS)
+        self.queue_wait_ms = Histogram(WAIT_BUCKETS_MS)
+        self.items = 0
+        self.rejected = 0
+        self._predict = predict
+        self._pending = []
+        self._cond = threading.Condition()
+        self._closed = False
+        self._started = time.perf_counter()
+        self._worker = threading.Thread(target=self._run, name="neurotwin-risk-coalescer", daemon=True)
+        self._worker.start()
+
+    def submit(self, avg_stress, avg_sleep, note_distress=0.0):
+        future = Future()
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("RiskCoalescer is closed")
+            if self.max_pending is not None and len(self._pending) >= self.max_pending:
+                self.rejected += 1
+                raise CoalescerFull(f"{len(self._pending)} requests already pending")
+            self._pending.append((float(avg_stress), float(avg_sleep), float(note_distress),
+                                  time.perf_counter(), future))
+            self._cond.notify()
+        return future
+
+    def predict(self, avg_stress, avg_sleep, note_distress=0.0, timeout=None):
+        return self.submit(avg_stress, avg_sleep, note_distress).result(timeout=timeout)
+
+    def close(self, wait=True):
+        # Pending requests are still scored before the worker exits
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        if wait:
+            self._worker.join()
+
+    def stats(self):
+        with self._cond:
+            elapsed = time.perf_counter() - self._started
+            return {
+                "items": self.items,
+                "batches": self.batch_sizes.count,
+                "rejected": self.rejected,
+                "pending": len(self._pending),
+                "items_per_sec": self.items / elapsed if elapsed > 0 else 0.0,
+                "batch_size": self.batch_sizes.snapshot(),
+                "queue_wait_ms": self.queue_wait_ms.snapshot(),
+            }
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._pending and not self._closed:
+                    self._cond.wait()
+                if not self._pending:
+                    return
+                # The oldest request sets the deadline, so no caller waits past max_wait
+                deadline = self._pending[0][3] + self.max_wait
+                while len(self._pending) < self.max_batch and not self._closed:
+                    remaining = deadline - time.perf_counter()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                batch = self._pending[:self.max_batch]
+                del self._pending[:self.max_batch]
+            self._score(batch)
+
+    def _score(self, batch):
+        started = time.perf_counter()
+        futures = [item[4] for item in batch]
+        # Drop requests whose caller cancelled while queued
+        live = [i for i, f in enumerate(futures) if f.set_running_or_notify_cancel()]
+        with self._cond:
+            self.batch_sizes.observe(len(batch))
+            self.items += len(batch)
+            for item in batch:
+                self.queue_wait_ms.observe((started - item[3]) * 1000)
+        if not live:
+            return
+        inputs = np.array([batch[i][:3] for i in live], dtype=np.float64)
+        try:
+            risks = self._predict(inputs[:, 0], inputs[:, 1], note_distress=inputs[:, 2])
+        except Exception as e:
+            for i in live:
+                futures[i].set_exception(e)
+            return
+        for i, risk in zip(live, np.asarray(risks).tolist()):
+            futures[i].set_result(risk)
+
+_coalescer = None
+_coalescer_lock = threading.Lock()
+
+def get_risk_coalescer(**kwargs):
+    global _coalescer
+    with _coalescer_lock:
+        if _coalescer is None:
+            _coalescer = RiskCoalescer(**kwargs)
+        return _coalescer
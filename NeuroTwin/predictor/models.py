@@ -0,0 +1,194 @@
+import abc
+import functools
+import os
+import struct
+import zipfile
+import numpy as np
+import pandas as pd
+from predictor.risk import BASE_RISK, NOTE_WEIGHT, SLEEP_WEIGHT, STRESS_WEIGHT
+
+# Pluggable sequence risk models with pure-NumPy batched inference.
+# A model scores a (patients, days, features) float32 tensor in one call;
+# features are FEATURES, one row per diary day. Weights live in an
+# uncompressed .npz that is memory-mapped member by member, so loading a
+# model costs page faults rather than a full read.
+#   model = load_model("gru", "weights/gru.npz")
+#   x, lengths = sequence_tensor(frames, days=90)
+#   risk = model.predict(x, lengths)
+FEATURES = ("stress", "sleep_hours", "note_distress")
+MODEL_NAME = os.environ.get("NEUROTWIN_RISK_MODEL", "linear")
+MODEL_WEIGHTS = os.environ.get("NEUROTWIN_RISK_WEIGHTS")
+TIME_BLOCK = 32
+
+MODELS = {}
+
+def register_model(name):
+    def decorator(cls):
+        MODELS[name] = cls
+        cls.name = name
+        return cls
+    return decorator
+
+def load_weights(path):
+    # {name: array}; stored (uncompressed) members are np.memmap views into the file
+    weights = {}
+    with open(path, "rb") as f, zipfile.ZipFile(f) as archive:
+        for info in archive.infolist():
+            name = info.filename[:-4] if info.filename.endswith(".npy") else info.filename
+            if info.compress_type != zipfile.ZIP_STORED:
+                with archive.open(info) as member:
+                    weights[name] = np.lib.format.read_array(member)
+                continue
+            # Local file header: 30 fixed bytes, then the file name and extra field
+            f.seek(info.header_offset)
+            header = f.read(30)
+            name_len, extra_len = struct.unpack("<HH", header[26:30])
+            f.seek(info.header_offset + 30 + name_len + extra_len)
+            version = np.lib.format.read_magic(f)
+            read_header = np.lib.format.read_array_header_1_0 if version == (1, 0) else np.lib.format.read_array_header_2_0
+            shape, fortran, dtype = read_header(f)
+            if dtype.hasobject:
+                raise ValueError(f"{path}:{info.filename} holds Python objects and cannot be memory-mapped")
+            weights[name] = np.memmap(path, dtype=dtype, mode="r", offset=f.tell(), shape=shape,
+                                      order="F" if fortran else "C")
+    return weights
+
+def save_weights(path, **arrays):
+    # Uncompressed on purpose: compressed members cannot be memory-mapped
+    tmp_path = f"{path}.tmp.npz"
+    np.savez(tmp_path, **{k: np.ascontiguousarray(v, dtype=np.float32) for k, v in arrays.items()})
+    os.replace(tmp_path, path)
+    return path
+
+def sequence_tensor(frames, days):
+    # Stack diaries into (patients, days, features) of daily means, right-aligned
+    # on each diary's last day. Returns (tensor, lengths); missing days are zeros.
+    tensor = np.zeros((len(frames), days, len(FEATURES)), dtype=np.float32)
+    lengths = np.zeros(len(frames), dtype=np.int64)
+    for i, df in enumerate(frames):
+        columns = [c for c in FEATURES if c in df.columns]
+        daily = (df.assign(date=pd.to_datetime(df["date"], errors="coerce"))
+                   .dropna(subset=["date"])
+                   .groupby(pd.Grouper(key="date", freq="D"))[columns].mean()
+                   .dropna(how="all").tail(days))
+        n = len(daily)
+        for j, column in enumerate(FEATURES):
+            if column in daily.columns:
+                tensor[i, days - n:, j] = daily[column].to_numpy(dtype=np.float32)
+        lengths[i] = n
+    return np.nan_to_num(tensor), lengths
+
+class RiskModel(abc.ABC):
+    name = None
+    # Whether default_weights() are meaningful enough to serve without a weights file
+    serves_default_weights = False
+
+    def __init__(self, weights):
+        self.weights = weights
+
+    @classmethod
+    @abc.abstractmethod
+    def default_weights(cls):
+        pass
+
+    @abc.abstractmethod
+    def predict(self, x, lengths=None):
+        # x: (patients, days, features); lengths: valid (right-aligned) days per patient
+        pass
+
+def _valid_days(x, lengths):
+    days = x.shape[1]
+    if lengths is None:
+        return np.ones(x.shape[:2], dtype=bool)
+    return np.arange(days)[None, :] >= (days - np.asarray(lengths))[:, None]
+
+@register_model("linear")
+class LinearRiskModel(RiskModel):
+    # Mean of each feature over the valid days, then a linear score; the
+    # default weights reproduce predictor.risk.expected_risk exactly
+    serves_default_weights = True
+
+    @classmethod
+    def default_weights(cls):
+        return {"w": np.array([STRESS_WEIGHT, -SLEEP_WEIGHT, NOTE_WEIGHT], dtype=np.float32),
+                "b": np.array([BASE_RISK], dtype=np.float32)}
+
+    def predict(self, x, lengths=None):
+        x = np.asarray(x, dtype=np.float32)
+        mask = _valid_days(x, lengths)
+        counts = np.maximum(mask.sum(axis=1, keepdims=True), 1)
+        means = np.einsum("pdf,pd->pf", x, mask.astype(np.float32)) / counts
+        return np.clip(means @ self.weights["w"] + self.weights["b"][0], 0, 100)
+
+@register_model("gru")
+class GRURiskModel(RiskModel):
+    # Single-layer GRU over the days with a sigmoid head scaled to 0-100.
+    # Weights: W (features, 3H), U (H, 3H), b (3H,) in [update, reset, candidate]
+    # order, plus head w_out (H,) and b_out (1,); inputs are standardized with
+    # mean/scale (features,).
+    @classmethod
+    def default_weights(cls, hidden=16, seed=0):
+        # Untrained, seeded weights: the right shapes for wiring and benchmarks
+        rng = np.random.default_rng(seed)
+        f = len(FEATURES)
+        scale = 1 / np.sqrt(hidden)
+        return {
+            "W": rng.uniform(-scale, scale, (f, 3 * hidden)).astype(np.float32),
+            "U": rng.uniform(-scale, scale, (hidden, 3 * hidden)).astype(np.float32),
+            "b": np.zeros(3 * hidden, dtype=np.float32),
+            "w_out": rng.uniform(-scale, scale, hidden).astype(np.float32),
+            "b_out": np.zeros(1, dtype=np.float32),
+            "mean": np.array([5.0, 7.0, 0.0], dtype=np.float32),
+            "scale": np.array([2.5, 1.5, 0.5], dtype=np.float32),
+        }
+
+    @property
+    def hidden(self):
+        return self.weights["U"].shape[0]
+
+    def predict(self, x, lengths=None):
+        w = self.weights
+        x = (np.asarray(x, dtype=np.float32) - w["mean"]) / w["scale"]
+        patients, days, features = x.shape
+        hidden = self.hidden
+        mask = _valid_days(x, lengths)
+        U_zr, U_n = w["U"][:, :2 * hidden], w["U"][:, 2 * hidden:]
+        h = np.zeros((patients, hidden), dtype=np.float32)
+        for start in range(0, days, TIME_BLOCK):
+            block = x[:, start:start + TIME_BLOCK]
+            # Input projections for a block of days in one matmul; only h @ U stays
+            # per step. Blocking keeps the projection buffer small for 365-day runs.
+            projected = (block.reshape(-1, features) @ w["W"] + w["b"]).reshape(patients, -1, 3 * hidden)
+            for step in range(projected.shape[1]):
+                p = projected[:, step]
+                zr = _sigmoid(p[:, :2 * hidden] + h @ U_zr)
+                z, r = zr[:, :hidden], zr[:, hidden:]
+                n = np.tanh(p[:, 2 * hidden:] + (r * h) @ U_n)
+                h_next = (1 - z) * n + z * h
+                # Padding days (before a short diary starts) leave the state untouched
+                h = np.where(mask[:, start + step, None], h_next, h)
+        return 100 * _sigmoid(h @ w["w_out"] + w["b_out"][0])
+
+def _sigmoid(x):
+    return 0.5 * (1 + np.tanh(0.5 * x))
+
+@functools.lru_cache(maxsize=8)
+def _load_model(name, path, mtime_ns):
+    if name not in MODELS:
+        raise ValueError(f"Unknown risk model '{name}', expected one of {sorted(MODELS)}")
+    cls = MODELS[name]
+    if path:
+        return cls(load_weights(path))
+    if not cls.serves_default_weights:
+        # Untrained seeded weights must never be served by accident
+        raise ValueError(f"Risk model '{name}' needs a weights file (set NEUROTWIN_RISK_WEIGHTS)")
+    return cls(cls.default_weights())
+
+def load_model(name=None, path=None):
+    # Without a name, the model comes from NEUROTWIN_RISK_MODEL and (unless a path
+    # is given) its weights from NEUROTWIN_RISK_WEIGHTS. Cached per (name, weights
+    # file, mtime): a rewritten weights file is picked up
+    if name is None:
+        name, path = MODEL_NAME, path or MODEL_WEIGHTS
+    mtime_ns = os.stat(path).st_mtime_ns if path else None
+    return _load_model(name, path, mtime_ns)
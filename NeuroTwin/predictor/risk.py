@@ -1,7 +1,71 @@
+import os
 import numpy as np
+import pandas as pd
 
-def predict_depression(avg_stress, avg_sleep):
-    # LSTM-like risk model (mock but realistic)
-    base = 40 + (avg_stress * 6.2) - (avg_sleep * 3.8)
-    noise = np.random.uniform(-8, 8)
+# Linear risk formula over diary means; sequence models over the daily diary
+# live in predictor.models (its "linear" model reproduces expected_risk)
+BASE_RISK = 40
+STRESS_WEIGHT = 6.2
+SLEEP_WEIGHT = 3.8
+NOISE_RANGE = 8
+# Points added per unit of mean note distress (twin.enrich scores notes in [-1, 1]).
+# Uncalibrated, so opt-in: displayed risks ignore notes unless NEUROTWIN_NOTE_WEIGHT is set
+NOTE_WEIGHT = float(os.environ.get("NEUROTWIN_NOTE_WEIGHT", "0"))
+
+def _base_risk(stress, sleep, note_distress=0.0):
+    return BASE_RISK + (stress * STRESS_WEIGHT) - (sleep * SLEEP_WEIGHT) + (note_distress * NOTE_WEIGHT)
+
+def expected_risk(avg_stress, avg_sleep, note_distress=0.0):
+    # Noise-free risk for display and trends
+    return np.clip(_base_risk(avg_stress, avg_sleep, note_distress), 0, 100)
+
+def predict_depression(avg_stress, avg_sleep, rng=None, note_distress=0.0):
+    base = _base_risk(avg_stress, avg_sleep, note_distress)
+    # rng is an optional np.random.Generator for reproducible scores
+    noise = rng.uniform(-NOISE_RANGE, NOISE_RANGE) if rng is not None else np.random.uniform(-NOISE_RANGE, NOISE_RANGE)
     return np.clip(base + noise, 0, 100)
+
+def predict_depression_batch(avg_stress, avg_sleep=None, rng=None, note_distress=None,
+                             stress_col='stress', sleep_col='sleep_hours', note_col='note_distress'):
+    # Score many patients in one vectorized pass.
+    # Accepts two arrays, or a DataFrame of per-patient aggregates as the first argument.
+    # With the same seeded Generator, row i equals the i-th sequential predict_depression call.
+    if isinstance(avg_stress, pd.DataFrame):
+        frame = avg_stress
+        avg_stress = frame[stress_col].to_numpy(dtype=np.float64)
+        avg_sleep = frame[sleep_col].to_numpy(dtype=np.float64)
+        if note_distress is None and note_col in frame.columns:
+            note_distress = frame[note_col].to_numpy(dtype=np.float64)
+    else:
+        avg_stress = np.asarray(avg_stress, dtype=np.float64)
+        avg_sleep = np.asarray(avg_sleep, dtype=np.float64)
+    if avg_stress.shape != avg_sleep.shape:
+        raise ValueError(f"stress and sleep shapes differ: {avg_stress.shape} vs {avg_sleep.shape}")
+
+    note_distress = 0.0 if note_distress is None else np.asarray(note_distress, dtype=np.float64)
+    base = _base_risk(avg_stress, avg_sleep, note_distress)
+    if rng is not None:
+        noise = rng.uniform(-NOISE_RANGE, NOISE_RANGE, size=base.shape)
+    else:
+        noise = np.random.uniform(-NOISE_RANGE, NOISE_RANGE, size=base.shape)
+    return np.clip(base + noise, 0, 100)
+
+def daily_risk(df, window=None, stress_col='stress', sleep_col='sleep_hours', date_col='date'):
+    # Noise-free per-entry risk for trend charts, computed on whole columns.
+    # window: None for raw values, an int for an N-entry rolling mean,
+    # or an offset string like '7D' / '30D' for a calendar rolling mean over date_col.
+    stress = pd.to_numeric(df[stress_col], errors='coerce').to_numpy(dtype=np.float64)
+    sleep = pd.to_numeric(df[sleep_col], errors='coerce').to_numpy(dtype=np.float64)
+    notes = df['note_distress'].to_numpy(dtype=np.float64) if 'note_distress' in df.columns else 0.0
+    risk = pd.Series(np.clip(_base_risk(stress, sleep, notes), 0, 100), index=df.index, name='risk')
+    if window is None:
+        return risk
+    if isinstance(window, str):
+        dates = pd.to_datetime(df[date_col])
+        order = np.argsort(dates.to_numpy(), kind='stable')
+        by_date = pd.Series(risk.to_numpy()[order], index=pd.DatetimeIndex(dates.to_numpy()[order]))
+        rolled = by_date.rolling(window, min_periods=1).mean().to_numpy()
+        values = np.empty_like(rolled)
+        values[order] = rolled
+        return pd.Series(values, index=df.index, name=f'risk_{window}')
+    return risk.rolling(int(window), min_periods=1).mean().rename(f'risk_{window}')
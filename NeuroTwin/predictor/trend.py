@@ -0,0 +1,67 @@
+import numpy as np
+import pandas as pd
+from predictor.risk import daily_risk
+
+# Trend series for charts: resample the per-entry risk to day/week/month
+# means, then LTTB-downsample to roughly one point per couple of pixels, so
+# the browser payload stays bounded however long the diary gets.
+FREQUENCIES = {"day": "D", "week": "W", "month": "MS"}
+PIXELS_PER_POINT = 2
+DEFAULT_WIDTH = 1000
+# Pixel widths the dashboards offer for trend charts
+CHART_WIDTHS = (600, 800, 1000, 1400, 2000)
+
+def points_for_width(width=None, pixels_per_point=PIXELS_PER_POINT):
+    return max(int((width or DEFAULT_WIDTH) / pixels_per_point), 3)
+
+def choose_frequency(dates, target_points):
+    # Finest bucket that keeps the resampled series near the target
+    span_days = (dates.max() - dates.min()) / pd.Timedelta(days=1) + 1
+    if span_days <= target_points:
+        return "day"
+    if span_days / 7 <= target_points:
+        return "week"
+    return "month"
+
+def resample_risk(dates, risk, freq="day"):
+    series = pd.Series(np.asarray(risk, dtype=np.float64), index=pd.DatetimeIndex(dates))
+    series = series[series.index.notna()].sort_index()
+    return series.resample(FREQUENCIES[freq]).mean().dropna()
+
+def lttb(x, y, threshold):
+    # Largest-Triangle-Three-Buckets: indices of the points that keep the visual shape
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+    keep = np.empty(threshold, dtype=np.int64)
+    keep[0] = 0
+    keep[-1] = n - 1
+    a = 0
+    for i in range(threshold - 2):
+        lo, hi = edges[i], edges[i + 1]
+        # Average of the next bucket is the third triangle corner
+        nxt = edges[i + 2] if i + 2 < len(edges) else n
+        cx = x[hi:nxt].mean()
+        cy = y[hi:nxt].mean()
+        area = np.abs((x[a] - cx) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (cy - y[a]))
+        a = lo + int(area.argmax())
+        keep[i + 1] = a
+    return keep
+
+def build_trend(df, freq="auto", points=None, window=None):
+    # Series of risk indexed by date, at most ~points long
+    points = points or points_for_width()
+    dates = pd.to_datetime(df["date"], errors="coerce")
+    risk = daily_risk(df, window=window)
+    if len(df) == 0 or dates.isna().all():
+        return pd.Series(dtype=np.float64, name="risk")
+    if freq == "auto":
+        freq = choose_frequency(dates, points)
+    series = resample_risk(dates, risk, freq) if freq else pd.Series(risk.to_numpy(), index=pd.DatetimeIndex(dates))
+    if len(series) > points:
+        keep = lttb(series.index.asi8, series.to_numpy(), points)
+        series = series.iloc[keep]
+    return series.rename("risk")
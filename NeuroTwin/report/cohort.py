@@ -0,0 +1,138 @@
+import argparse
+import hashlib
+import os
+import sys
+import tarfile
+import tempfile
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from brain.renderer import render_brain
+from report.worker import build_pdf, render_png, warm_kaleido
+from twin.builder import DigitalTwin
+
+# Offline cohort reports: one PDF per patient diary, spread over a process pool.
+#   python -m report.cohort diaries/ reports/ --workers 4
+#   python -m report.cohort export.zip reports/
+# Existing PDFs are skipped, so an interrupted run resumes where it stopped.
+DIARY_SUFFIXES = (".csv", ".parquet")
+BRAIN_CACHE = ".brain_cache"
+
+def find_diaries(root):
+    # (patient_id, path) pairs. The ID is the path relative to root without its
+    # suffix ("site_a/p1"), so same-named diaries in different folders stay apart;
+    # its report goes to the same relative path under out_dir.
+    diaries = {}
+    for dirpath, _, files in os.walk(root):
+        for name in sorted(files):
+            if name.endswith(DIARY_SUFFIXES) and not name.startswith("."):
+                path = os.path.join(dirpath, name)
+                patient_id = os.path.splitext(os.path.relpath(path, root))[0].replace(os.sep, "/")
+                if patient_id in diaries:
+                    raise ValueError(f"Two diaries map to patient '{patient_id}': {diaries[patient_id]} and {path}")
+                diaries[patient_id] = path
+    return sorted(diaries.items())
+
+def report_path(out_dir, patient_id):
+    return os.path.join(out_dir, *f"{patient_id}.pdf".split("/"))
+
+def extract_archive(path, dest):
+    if zipfile.is_zipfile(path):
+        with zipfile.ZipFile(path) as archive:
+            archive.extractall(dest)
+    elif tarfile.is_tarfile(path):
+        with tarfile.open(path) as archive:
+            archive.extractall(dest, filter="data")
+    else:
+        raise ValueError(f"Not a directory or a zip/tar archive: {path}")
+    return dest
+
+def risk_bucket(risk, bucket_size):
+    return round(np.floor(float(risk) / bucket_size) * bucket_size, 1)
+
+def patient_seed(patient_id, seed):
+    digest = hashlib.blake2b(f"{seed}:{patient_id}".encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "little")
+
+_png_cache = {}
+
+def bucket_png(bucket, out_dir):
+    # Shared by every patient in the bucket: in memory per process, on disk across processes and runs
+    if bucket in _png_cache:
+        return _png_cache[bucket]
+    path = os.path.join(out_dir, BRAIN_CACHE, f"risk_{bucket:05.1f}.png")
+    png = None
+    if os.path.isfile(path):
+        with open(path, "rb") as f:
+            png = f.read()
+    else:
+        png = render_png(render_brain(bucket))
+        if png:
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(png)
+            os.replace(tmp_path, path)
+    _png_cache[bucket] = png
+    return png
+
+def write_report(patient_id, diary_path, out_dir, bucket_size=1.0, seed=0):
+    twin = DigitalTwin(diary_path)
+    twin.build(rng=np.random.default_rng(patient_seed(patient_id, seed)))
+    risk = round(float(twin.risk), 1)
+    png = bucket_png(risk_bucket(risk, bucket_size), out_dir)
+    pdf = build_pdf(risk, twin.stats.avg_stress, twin.stats.avg_sleep, png=png,
+                    title=f"NeuroTwin Report - {patient_id}")
+    out_path = report_path(out_dir, patient_id)
+    os.makedirs(os.path.dirname(out_path), exist_ok=True)
+    tmp_path = out_path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(pdf)
+    # Atomic rename: a report either exists completely or not at all
+    os.replace(tmp_path, out_path)
+    return patient_id, risk
+
+def run_cohort(source, out_dir, workers=None, bucket_size=1.0, seed=0, force=False, log=print):
+    os.makedirs(os.path.join(out_dir, BRAIN_CACHE), exist_ok=True)
+    with tempfile.TemporaryDirectory() as scratch:
+        root = source if os.path.isdir(source) else extract_archive(source, scratch)
+        diaries = find_diaries(root)
+        todo = [(pid, path) for pid, path in diaries
+                if force or not os.path.isfile(report_path(out_dir, pid))]
+        skipped = len(diaries) - len(todo)
+        log(f"{len(diaries)} diaries found, {skipped} already reported, {len(todo)} to generate")
+
+        done = failed = 0
+        started = time.perf_counter()
+        with ProcessPoolExecutor(max_workers=workers, initializer=warm_kaleido) as pool:
+            futures = {pool.submit(write_report, pid, path, out_dir, bucket_size, seed): pid for pid, path in todo}
+            for future in as_completed(futures):
+                try:
+                    future.result()
+                    done += 1
+                except Exception as e:
+                    failed += 1
+                    log(f"  {futures[future]}: failed ({e})")
+        elapsed = time.perf_counter() - started
+
+    rate = done / elapsed if elapsed > 0 else 0.0
+    log(f"{done} reports in {elapsed:.1f}s ({rate:.1f} reports/s), {skipped} skipped, {failed} failed")
+    return {"generated": done, "skipped": skipped, "failed": failed, "seconds": elapsed, "reports_per_sec": rate}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate one NeuroTwin PDF report per patient diary.")
+    parser.add_argument("source", help="directory or zip/tar archive of diary CSV/Parquet files")
+    parser.add_argument("out_dir", help="directory for <patient>.pdf reports, mirroring the source folders")
+    parser.add_argument("--workers", type=int, default=None, help="process pool size (default: CPU count)")
+    parser.add_argument("--bucket-size", type=float, default=1.0, help="risk bucket width for shared brain images")
+    parser.add_argument("--seed", type=int, default=0, help="seed for reproducible per-patient risk noise")
+    parser.add_argument("--force", action="store_true", help="regenerate reports that already exist")
+    args = parser.parse_args(argv)
+    summary = run_cohort(args.source, args.out_dir, args.workers, args.bucket_size, args.seed, args.force)
+    return 1 if summary["failed"] else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,129 @@
+import io
+import itertools
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+# Background PDF report pipeline. Jobs run on a small thread pool and build
+# their PNG and PDF entirely in memory, so concurrent users never share files.
+# Kaleido's Chrome process is started once and kept warm for every job.
+IMAGE_WIDTH = 900
+IMAGE_HEIGHT = 600
+MAX_TRACKED_JOBS = 256
+
+_kaleido_lock = threading.Lock()
+_kaleido_warm = False
+
+def warm_kaleido(tabs=2):
+    global _kaleido_warm
+    with _kaleido_lock:
+        if _kaleido_warm:
+            return True
+        try:
+            import kaleido
+            import plotly.graph_objects as go
+            # One-shot probe first: a persistent server without a usable Chrome would hang callers
+            go.Figure().to_image(format="png", width=10, height=10)
+            # kaleido>=1.0 keeps a persistent server that plotly's to_image reuses
+            if hasattr(kaleido, "start_sync_server"):
+                kaleido.start_sync_server(n=tabs, silence_warnings=True)
+            _kaleido_warm = True
+        except Exception as e:
+            logging.warning(f"Kaleido warm-up failed, reports will render without it: {e}")
+        return _kaleido_warm
+
+def render_png(fig, width=IMAGE_WIDTH, height=IMAGE_HEIGHT):
+    try:
+        return fig.to_image(format="png", width=width, height=height)
+    except Exception as e:
+        logging.warning(f"Brain snapshot failed: {e}")
+        return None
+
+def build_pdf(risk, avg_stress, avg_sleep, png=None, generated_at=None, title="NeuroTwin Report"):
+    # fpdf (and its font tables) costs ~250 ms to import, so it loads with the first report
+    from fpdf import FPDF
+    generated_at = generated_at or datetime.now()
+    pdf = FPDF()
+    pdf.add_page()
+    pdf.set_font("Helvetica", 'B', 16)
+    pdf.cell(0, 10, title, new_x="LMARGIN", new_y="NEXT", align='C')
+    pdf.ln(8)
+    pdf.set_font("Helvetica", size=12)
+    pdf.cell(0, 10, f"Risk Level: {risk}%", new_x="LMARGIN", new_y="NEXT")
+    pdf.cell(0, 10, f"Average Stress: {avg_stress:.1f}/10", new_x="LMARGIN", new_y="NEXT")
+    pdf.cell(0, 10, f"Average Sleep: {avg_sleep:.1f} hours", new_x="LMARGIN", new_y="NEXT")
+    if png:
+        pdf.ln(5)
+        pdf.image(io.BytesIO(png), w=pdf.epw)
+    pdf.ln(5)
+    pdf.set_font("Helvetica", 'I', 10)
+    pdf.multi_cell(0, 5, f"Generated on {generated_at.strftime('%Y-%m-%d %H:%M:%S')}")
+    return bytes(pdf.output())
+
+class ReportJob:
+    def __init__(self, job_id, future):
+        self.id = job_id
+        self._future = future
+
+    def done(self):
+        return self._future.done()
+
+    @property
+    def status(self):
+        if not self._future.done():
+            return "running" if self._future.running() else "queued"
+        return "failed" if self._future.exception() is not None else "done"
+
+    @property
+    def error(self):
+        return self._future.exception() if self._future.done() else None
+
+    def result(self, timeout=None):
+        # PDF bytes; blocks until the job finishes unless timeout is given
+        return self._future.result(timeout=timeout)
+
+class ReportWorker:
+    def __init__(self, max_workers=2, warm=True):
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="neurotwin-report")
+        self._ids = itertools.count(1)
+        self._jobs = {}
+        self._lock = threading.Lock()
+        if warm:
+            # Pay the Chrome startup once, off the UI thread
+            self._pool.submit(warm_kaleido, max_workers)
+
+    def submit(self, risk, avg_stress, avg_sleep, fig=None):
+        future = self._pool.submit(self._run, risk, avg_stress, avg_sleep, fig)
+        with self._lock:
+            job = ReportJob(next(self._ids), future)
+            self._jobs[job.id] = job
+            # Drop the oldest finished handles so a long-lived process stays bounded
+            for old_id in [i for i, j in self._jobs.items() if j.done()][:max(0, len(self._jobs) - MAX_TRACKED_JOBS)]:
+                del self._jobs[old_id]
+        return job
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def forget(self, job_id):
+        with self._lock:
+            self._jobs.pop(job_id, None)
+
+    def shutdown(self, wait=True):
+        self._pool.shutdown(wait=wait)
+
+    def _run(self, risk, avg_stress, avg_sleep, fig):
+        png = render_png(fig) if fig is not None else None
+        return build_pdf(risk, avg_stress, avg_sleep, png=png)
+
+_worker = None
+_worker_lock = threading.Lock()
+
+def get_report_worker():
+    global _worker
+    with _worker_lock:
+        if _worker is None:
+            _worker = ReportWorker()
+        return _worker
@@ -0,0 +1,160 @@
+import asyncio
+import contextlib
+import math
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pandas as pd
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+from brain.spec import brain_spec
+from predictor.coalescer import CoalescerFull, Histogram, RiskCoalescer
+from predictor.risk import predict_depression_batch
+from twin.builder import DigitalTwin
+
+# Headless scoring service for intake systems.
+#   uvicorn service.app:app --app-dir NeuroTwin --port 8600
+# POST /score        one patient: {"avg_stress", "avg_sleep"[, "note_distress"]}
+#                    or a diary: {"entries": [{"stress", "sleep_hours"[, "notes", ...]}, ...]}
+# POST /score/batch  {"patients": [<patient>, ...]} scored in one vectorized call
+# GET  /brain-spec   ?risk=<0-100> renderer-neutral brain view
+# GET  /metrics      per-route latency histograms, micro-batch sizes and queue waits
+# Concurrent /score requests are coalesced by a RiskCoalescer into a single
+# predict_depression_batch call per batch.
+MAX_BATCH = 256
+MAX_WAIT_MS = 2.0
+MAX_PENDING = 10_000
+LATENCY_BUCKETS_MS = (0.5, 1, 2, 5, 10, 25, 50, 100, 250, 500, 1000)
+
+def _finite(value, name):
+    # float() accepts "nan"/"inf", which would make the risk (and the JSON response) NaN
+    value = float(value)
+    if not math.isfinite(value):
+        raise ValueError(f"{name} must be a finite number")
+    return value
+
+def patient_inputs(patient):
+    # (avg_stress, avg_sleep, note_distress, entries) from aggregates or a raw diary
+    if not isinstance(patient, dict):
+        raise ValueError("each patient must be a JSON object")
+    if "entries" in patient:
+        df = pd.DataFrame(patient["entries"])
+        missing = [c for c in ("stress", "sleep_hours") if c not in df.columns]
+        if df.empty or missing:
+            raise ValueError(f"entries need stress and sleep_hours (missing {', '.join(missing) or 'rows'})")
+        df[["stress", "sleep_hours"]] = df[["stress", "sleep_hours"]].apply(pd.to_numeric, errors="raise")
+        if np.isinf(df[["stress", "sleep_hours"]].to_numpy(dtype=np.float64)).any():
+            raise ValueError("entries need finite stress and sleep_hours")
+        stats = DigitalTwin(frame=df).aggregate()
+        if stats.count == 0:
+            raise ValueError("entries have no row with both stress and sleep_hours")
+        return stats.avg_stress, stats.avg_sleep, stats.avg_note_distress, stats.count
+    try:
+        return (_finite(patient["avg_stress"], "avg_stress"), _finite(patient["avg_sleep"], "avg_sleep"),
+                _finite(patient.get("note_distress", 0.0), "note_distress"), None)
+    except KeyError as e:
+        raise ValueError(f"missing field {e.args[0]}") from e
+
+def _result(inputs, risk):
+    avg_stress, avg_sleep, note_distress, entries = inputs
+    result = {"risk": round(float(risk), 1), "avg_stress": avg_stress, "avg_sleep": avg_sleep,
+              "note_distress": note_distress}
+    if entries is not None:
+        result["entries"] = entries
+    return result
+
+def _error(message, status=400):
+    return JSONResponse({"error": message}, status_code=status)
+
+async def score(request: Request):
+    try:
+        inputs = patient_inputs(await request.json())
+    except (ValueError, TypeError) as e:
+        return _error(str(e))
+    try:
+        future = request.app.state.coalescer.submit(*inputs[:3])
+    except CoalescerFull as e:
+        return _error(f"overloaded: {e}", status=503)
+    risk = await asyncio.wrap_future(future)
+    return JSONResponse(_result(inputs, risk))
+
+async def score_batch(request: Request):
+    try:
+        body = await request.json()
+        patients = body.get("patients") if isinstance(body, dict) else None
+        if not isinstance(patients, list):
+            raise ValueError('expected {"patients": [...]}')
+        inputs = [patient_inputs(p) for p in patients]
+    except (ValueError, TypeError) as e:
+        return _error(str(e))
+    if not inputs:
+        return JSONResponse({"results": []})
+    arrays = np.array([i[:3] for i in inputs], dtype=np.float64)
+    # Already a batch: one vectorized call, no need to queue behind /score traffic
+    risks = predict_depression_batch(arrays[:, 0], arrays[:, 1], note_distress=arrays[:, 2])
+    request.app.state.batch_sizes.observe(len(inputs))
+    return JSONResponse({"results": [_result(i, r) for i, r in zip(inputs, risks.tolist())]})
+
+async def brain_spec_route(request: Request):
+    try:
+        risk = _finite(request.query_params["risk"], "risk")
+    except (KeyError, ValueError):
+        return _error("risk query parameter (0-100) is required")
+    return JSONResponse(brain_spec(min(max(risk, 0.0), 100.0)))
+
+async def metrics(request: Request):
+    state = request.app.state
+    return JSONResponse({
+        "latency_ms": {route: hist.snapshot() for route, hist in state.latency.items()},
+        "coalescer": state.coalescer.stats(),
+        "batch_request_size": state.batch_sizes.snapshot(),
+    })
+
+class LatencyMiddleware:
+    # Plain ASGI middleware: one latency histogram per route path
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            latency = scope["app"].state.latency
+            path = scope["path"]
+            if path not in latency:
+                latency[path] = Histogram(LATENCY_BUCKETS_MS)
+            latency[path].observe((time.perf_counter() - started) * 1000)
+
+def create_app(max_batch=MAX_BATCH, max_wait_ms=MAX_WAIT_MS, max_pending=MAX_PENDING):
+    @contextlib.asynccontextmanager
+    async def lifespan(app):
+        app.state.coalescer = RiskCoalescer(max_batch=max_batch, max_wait_ms=max_wait_ms, max_pending=max_pending)
+        app.state.latency = {}
+        app.state.batch_sizes = Histogram((1, 10, 100, 1000, 10_000))
+        yield
+        app.state.coalescer.close()
+
+    app = Starlette(routes=[
+        Route("/score", score, methods=["POST"]),
+        Route("/score/batch", score_batch, methods=["POST"]),
+        Route("/brain-spec", brain_spec_route, methods=["GET"]),
+        Route("/metrics", metrics, methods=["GET"]),
+    ], lifespan=lifespan)
+    app.add_middleware(LatencyMiddleware)
+    return app
+
+app = create_app()
+
+if __name__ == "__main__":
+    import uvicorn
+    uvicorn.run(app, host=os.environ.get("NEUROTWIN_HOST", "127.0.0.1"),
+                port=int(os.environ.get("NEUROTWIN_PORT", "8600")))
@@ -1,6 +1,10 @@
 import pandas as pd
 import numpy as np
 from predictor.risk import predict_depression
+from twin.stats import MoodAggregates
+from twin.enrich import NOTE_COLUMN, enrich_notes, score_notes
+from twin.ingest import STREAM_COLUMNS_WITH_NOTES, stream_diary
+from twin.store import load_diary
 import logging
 import os
 
@@ -10,16 +14,75 @@ if not os.path.exists('logs'):
 logging.basicConfig(filename='logs/neurotwin.log', level=logging.INFO)
 
 class DigitalTwin:
-    def __init__(self, mood_file):
-        self.df = pd.read_csv(mood_file)
+    def __init__(self, mood_file=None, window=7, stream=False, chunksize=100_000,
+                 columns=None, start=None, end=None, frame=None):
+        # stream=True reads the CSV in chunks with compact dtypes and keeps only
+        # the aggregates plus the last `window` rows in self.df.
+        # A .parquet diary is memory-mapped and only `columns` within [start, end] are loaded.
+        # frame= wraps an already-loaded (shared, read-only) diary instead of reading mood_file.
         self.risk = 0
+        self.live_entries = []
+        self.ingest_report = None
+        if frame is not None:
+            self.df = frame
+            self.stats = MoodAggregates(window=window)
+        elif stream:
+            self.stats, self.df, self.ingest_report = stream_diary(
+                mood_file, chunksize=chunksize, window=window, columns=columns or STREAM_COLUMNS_WITH_NOTES)
+            logging.info(f"Streamed mood diary: {self.ingest_report}")
+        elif str(mood_file).endswith('.parquet'):
+            self.df = load_diary(mood_file, columns=columns, start=start, end=end)
+            self.stats = MoodAggregates(window=window)
+        else:
+            self.df = pd.read_csv(mood_file, usecols=columns)
+            if start is not None or end is not None:
+                dates = pd.to_datetime(self.df['date'])
+                keep = dates.between(pd.Timestamp(start or dates.min()), pd.Timestamp(end or dates.max()))
+                self.df = self.df[keep].reset_index(drop=True)
+            self.stats = MoodAggregates(window=window)
     
-    def build(self):
-        logging.info(f"Digital Twin Built: {len(self.df)} days of mood data")
-        avg_stress = self.df['stress'].mean()
-        avg_sleep = self.df['sleep_hours'].mean()
-        self.risk = predict_depression(avg_stress, avg_sleep)
+    def aggregate(self):
+        # Reseed the running aggregates from self.df without scoring; batch
+        # scorers call this and predict many twins in one vectorized pass
+        if self.ingest_report is None:
+            self.stats = MoodAggregates(window=self.stats.window.maxlen)
+            self.stats.update_many(self.df['stress'], self.df['sleep_hours'])
+            if 'mood' in self.df.columns:
+                self.stats.update_moods(self.df['mood'].value_counts())
+            # Every row counts towards the note mean (empty or missing notes score 0);
+            # assign() gives this twin its own frame, so a shared registry frame stays untouched
+            if NOTE_COLUMN not in self.df.columns:
+                self.df = enrich_notes(self.df)
+            self.stats.update_notes(self.df[NOTE_COLUMN])
+            self.live_entries = []
+        return self.stats
+
+    def build(self, rng=None):
+        self.aggregate()
+        logging.info(f"Digital Twin Built: {self.stats.count} days of mood data")
+        self.risk = predict_depression(self.stats.avg_stress, self.stats.avg_sleep, rng=rng,
+                                       note_distress=self.stats.avg_note_distress)
         print(f"Digital Twin Built: Risk = {self.risk}%")
+
+    def append_entry(self, stress, sleep_hours, mood=None, date=None, notes=""):
+        # O(1) live update: fold the entry into the running aggregates, no DataFrame rebuild
+        if self.stats.count == 0 and len(self.df) and self.ingest_report is None:
+            self.build()
+        self.stats.update(stress, sleep_hours)
+        if mood is not None:
+            self.stats.update_moods({mood: 1})
+        # Empty notes count as 0, exactly as build() scores them
+        self.stats.update_note(score_notes([notes])[0] if notes else 0.0)
+        self.live_entries.append({
+            "date": date or pd.Timestamp.now().strftime("%Y-%m-%d"),
+            "mood": mood,
+            "stress": stress,
+            "sleep_hours": sleep_hours,
+            "notes": notes
+        })
+        self.risk = predict_depression(self.stats.avg_stress, self.stats.avg_sleep,
+                                       note_distress=self.stats.avg_note_distress)
+        return self.risk
     
     def predict_depression(self):
         return int(self.risk)
@@ -0,0 +1,146 @@
+import threading
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+from predictor.trend import build_trend
+from twin.entries import EntryBuffer
+from twin.heatmap import build_heatmap
+
+# Versioned session diary. Every mutation bumps the revision, and anything
+# derived from the diary (frame, trend, heatmap, sleep debt, text dump) is
+# computed once per (artifact, revision) and served from a shared LRU after
+# that, so reruns that do not touch the diary recompute nothing. The LRU is
+# bounded by entry count and by the approximate bytes its values hold.
+IDEAL_SLEEP_HOURS = 7.5
+DEFAULT_MAX_ENTRIES = 512
+DEFAULT_MAX_BYTES = 64 * 2**20
+
+def approx_nbytes(value):
+    # Bytes a cached value keeps alive. Zero-copy frames count the whole array
+    # they view, since that is what a superseded EntryBuffer revision pins.
+    if isinstance(value, (bytes, bytearray, str)):
+        return len(value)
+    if isinstance(value, np.ndarray):
+        return value.base.nbytes if isinstance(value.base, np.ndarray) else value.nbytes
+    if isinstance(value, pd.Series):
+        if isinstance(value.dtype, np.dtype) and value.dtype != object:
+            return approx_nbytes(value.to_numpy())
+        return int(value.memory_usage(index=False))
+    if isinstance(value, pd.DataFrame):
+        return sum(approx_nbytes(value[column]) for column in value.columns)
+    if hasattr(value, "values") and isinstance(value.values, np.ndarray):
+        return value.values.nbytes
+    return 64
+
+class DerivedCache:
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES, max_bytes=DEFAULT_MAX_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.used_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._artifacts = {}
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, artifact, revision, compute, params=()):
+        key = (artifact, params, revision)
+        with self._lock:
+            counts = self._artifacts.setdefault(artifact, [0, 0])
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                counts[0] += 1
+                return self._entries[key][0]
+            self.misses += 1
+            counts[1] += 1
+        value = compute()
+        nbytes = approx_nbytes(value)
+        if nbytes > self.max_bytes:
+            # Larger than the whole budget: served, never kept
+            return value
+        with self._lock:
+            if key in self._entries:
+                self.used_bytes -= self._entries[key][1]
+            self._entries[key] = (value, nbytes)
+            self.used_bytes += nbytes
+            while len(self._entries) > self.max_entries or self.used_bytes > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self.used_bytes -= evicted
+                self.evictions += 1
+        return value
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "used_bytes": self.used_bytes,
+                "max_bytes": self.max_bytes,
+                "evictions": self.evictions,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "artifacts": {name: {"hits": h, "misses": m, "hit_rate": h / (h + m)}
+                              for name, (h, m) in self._artifacts.items()},
+            }
+
+_cache = None
+_cache_lock = threading.Lock()
+
+def get_derived_cache():
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = DerivedCache()
+        return _cache
+
+class Diary:
+    def __init__(self, entries=None, cache=None):
+        self.entries = entries if entries is not None else EntryBuffer()
+        self.cache = cache if cache is not None else get_derived_cache()
+
+    @classmethod
+    def from_frame(cls, df, cache=None):
+        return cls(EntryBuffer.from_frame(df), cache=cache)
+
+    @property
+    def revision(self):
+        # uid keeps two diaries at the same version apart in the shared cache
+        return (self.entries.uid, self.entries.version)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def append(self, stress, sleep_hours, mood=None, date=None, notes="", note_distress=None):
+        self.entries.append(stress, sleep_hours, mood=mood, date=date, notes=notes, note_distress=note_distress)
+
+    def extend(self, df):
+        self.entries.extend(df)
+
+    def derived(self, artifact, compute, *params):
+        return self.cache.get(artifact, self.revision, compute, params)
+
+    def frame(self):
+        return self.derived("frame", self.entries.to_frame)
+
+    def trend(self, freq="auto", points=None, window=None):
+        return self.derived("trend", lambda: build_trend(self.frame(), freq=freq, points=points, window=window),
+                            freq, points, window)
+
+    def heatmap(self, weeks=1, column="stress"):
+        return self.derived("heatmap", lambda: build_heatmap(self.frame()["date"], self.frame()[column], weeks=weeks),
+                            weeks, column)
+
+    def sleep_debt(self, ideal_hours=IDEAL_SLEEP_HOURS):
+        # Hours short of `ideal_hours` per entry, summed over the diary (negative = surplus)
+        def compute():
+            return len(self) * ideal_hours - float(self.frame()["sleep_hours"].sum())
+        return self.derived("sleep_debt", compute, ideal_hours)
+
+    def to_string(self):
+        return self.derived("text", lambda: self.frame().to_string())
+
+    def to_csv(self):
+        return self.derived("csv", lambda: self.frame().to_csv(index=False).encode())
@@ -0,0 +1,71 @@
+import hashlib
+import threading
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+from voice.text_tone import distress_from_scores, load_lexicon
+
+# Notes enrichment for DigitalTwin.build: every diary note gets a numeric
+# distress score. Notes are factorized so each distinct phrase is scored
+# once per call, and scores are kept in a process-wide LRU keyed by a hash
+# of the note text so repeated phrases across diaries and sessions are free.
+NOTE_COLUMN = "note_distress"
+CACHE_SIZE = 200_000
+
+class NoteScoreCache:
+    def __init__(self, max_entries=CACHE_SIZE):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._scores = OrderedDict()
+        self._lock = threading.Lock()
+
+    def lookup(self, keys):
+        found = {}
+        with self._lock:
+            for key in keys:
+                if key in self._scores:
+                    self._scores.move_to_end(key)
+                    found[key] = self._scores[key]
+            self.hits += len(found)
+            self.misses += len(keys) - len(found)
+        return found
+
+    def store(self, items):
+        with self._lock:
+            for key, score in items:
+                self._scores[key] = score
+                self._scores.move_to_end(key)
+            while len(self._scores) > self.max_entries:
+                self._scores.popitem(last=False)
+
+_cache = NoteScoreCache()
+
+def note_key(text):
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest()
+
+def score_notes(notes, cache=_cache):
+    # float32 distress per note; missing notes score 0
+    codes, uniques = pd.factorize(pd.Series(notes, copy=False), use_na_sentinel=True)
+    texts = [str(u) for u in uniques]
+    keys = [note_key(t) for t in texts]
+    known = cache.lookup(keys)
+    missing = [i for i, key in enumerate(keys) if key not in known]
+    if missing:
+        scored = load_lexicon().score_many([texts[i] for i in missing])
+        values = distress_from_scores(scored["anxious"], scored["depressed"], scored["calm"])
+        fresh = [(keys[i], float(v)) for i, v in zip(missing, values)]
+        cache.store(fresh)
+        known.update(fresh)
+    unique_scores = np.array([known[key] for key in keys] + [0.0], dtype=np.float32)
+    # NaN notes have code -1, which indexes the trailing 0.0
+    return unique_scores[codes]
+
+def enrich_notes(df, column="notes"):
+    # Returns a new frame with NOTE_COLUMN; the input (possibly a shared registry frame) is untouched
+    if column not in df.columns:
+        return df.assign(**{NOTE_COLUMN: np.zeros(len(df), dtype=np.float32)})
+    return df.assign(**{NOTE_COLUMN: score_notes(df[column])})
+
+def cache_stats():
+    return {"entries": len(_cache._scores), "hits": _cache.hits, "misses": _cache.misses}
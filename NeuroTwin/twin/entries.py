@@ -0,0 +1,126 @@
+import itertools
+import numpy as np
+import pandas as pd
+from twin.enrich import NOTE_COLUMN, score_notes
+
+# Append-only session diary: one preallocated NumPy array per column that
+# doubles when full, so append is amortized O(1) and a long session never
+# re-copies its history. to_frame() wraps read-only views of the filled
+# prefix (zero-copy); copy the frame before editing it in place.
+INITIAL_CAPACITY = 64
+MOODS = ["happy", "neutral", "anxious", "depressed"]
+COLUMNS = ("date", "mood", "stress", "sleep_hours", "notes", NOTE_COLUMN)
+
+_uids = itertools.count(1)
+
+class EntryBuffer:
+    def __init__(self, capacity=INITIAL_CAPACITY):
+        capacity = max(int(capacity), 1)
+        self._dates = np.empty(capacity, dtype="datetime64[ns]")
+        # Mood as category codes into self.moods (-1 = missing)
+        self._moods = np.empty(capacity, dtype=np.int16)
+        self._stress = np.empty(capacity, dtype=np.float32)
+        self._sleep = np.empty(capacity, dtype=np.float32)
+        self._notes = np.empty(capacity, dtype=object)
+        self._distress = np.empty(capacity, dtype=np.float32)
+        self.moods = list(MOODS)
+        self._mood_codes = {m: i for i, m in enumerate(self.moods)}
+        self._size = 0
+        # (uid, version) identifies the contents: version is bumped on every write
+        self.uid = next(_uids)
+        self.version = 0
+
+    @classmethod
+    def from_frame(cls, df):
+        # Room for a few live rows only: sessions seed from shared registry
+        # frames, so doubling here would double every session's copy
+        buffer = cls(capacity=len(df) + INITIAL_CAPACITY)
+        buffer.extend(df)
+        return buffer
+
+    def __len__(self):
+        return self._size
+
+    @property
+    def capacity(self):
+        return len(self._stress)
+
+    def append(self, stress, sleep_hours, mood=None, date=None, notes="", note_distress=None):
+        if self._size == self.capacity:
+            self._grow(self._size + 1)
+        i = self._size
+        self._dates[i] = (pd.Timestamp(date) if date is not None else pd.Timestamp.now().normalize()).as_unit("ns").asm8
+        self._moods[i] = self._mood_code(mood)
+        self._stress[i] = stress
+        self._sleep[i] = sleep_hours
+        self._notes[i] = notes
+        if note_distress is None:
+            note_distress = score_notes([notes])[0] if notes else 0.0
+        self._distress[i] = note_distress
+        self._size += 1
+        self.version += 1
+
+    def extend(self, df):
+        n = len(df)
+        if n == 0:
+            return
+        if self._size + n > self.capacity:
+            self._grow(self._size + n)
+        rows = slice(self._size, self._size + n)
+        self._dates[rows] = pd.to_datetime(df["date"], errors="coerce").to_numpy(dtype="datetime64[ns]")
+        if "mood" in df.columns:
+            moods = pd.Series(df["mood"]).astype(object)
+            codes, uniques = pd.factorize(moods, use_na_sentinel=True)
+            lookup = np.array([self._mood_code(m) for m in uniques] + [-1], dtype=np.int16)
+            self._moods[rows] = lookup[codes]
+        else:
+            self._moods[rows] = -1
+        self._stress[rows] = df["stress"].to_numpy(dtype=np.float32)
+        self._sleep[rows] = df["sleep_hours"].to_numpy(dtype=np.float32)
+        if "notes" in df.columns:
+            self._notes[rows] = df["notes"].to_numpy(dtype=object)
+        else:
+            self._notes[rows] = ""
+        if NOTE_COLUMN in df.columns:
+            self._distress[rows] = df[NOTE_COLUMN].to_numpy(dtype=np.float32)
+        elif "notes" in df.columns:
+            self._distress[rows] = score_notes(df["notes"])
+        else:
+            self._distress[rows] = 0.0
+        self._size += n
+        self.version += 1
+
+    def to_frame(self):
+        n = self._size
+        moods = pd.Categorical.from_codes(self._view(self._moods), categories=list(self.moods), validate=False)
+        # Series(copy=False) per column keeps the DataFrame constructor from copying
+        return pd.DataFrame({
+            "date": pd.Series(self._view(self._dates), copy=False),
+            "mood": pd.Series(moods, copy=False),
+            "stress": pd.Series(self._view(self._stress), copy=False),
+            "sleep_hours": pd.Series(self._view(self._sleep), copy=False),
+            "notes": pd.Series(self._view(self._notes), dtype=object, copy=False),
+            NOTE_COLUMN: pd.Series(self._view(self._distress), copy=False),
+        }, index=pd.RangeIndex(n), copy=False)
+
+    def _view(self, array):
+        view = array[:self._size]
+        view.flags.writeable = False
+        return view
+
+    def _mood_code(self, mood):
+        if mood is None or (isinstance(mood, float) and np.isnan(mood)):
+            return -1
+        code = self._mood_codes.get(mood)
+        if code is None:
+            code = self._mood_codes[mood] = len(self.moods)
+            self.moods.append(mood)
+        return code
+
+    def _grow(self, needed):
+        capacity = max(needed, 2 * self.capacity)
+        for name in ("_dates", "_moods", "_stress", "_sleep", "_notes", "_distress"):
+            old = getattr(self, name)
+            new = np.empty(capacity, dtype=old.dtype)
+            new[:self._size] = old[:self._size]
+            setattr(self, name, new)
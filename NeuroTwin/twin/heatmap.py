@@ -0,0 +1,57 @@
+import numpy as np
+import pandas as pd
+
+# Weekday x week calendar heatmap of a diary column (mean per day).
+# Only the last `weeks` weeks are touched: the tail is sliced by date first,
+# then each entry is binned with integer indexing into a 7 x weeks grid.
+WEEKDAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+DAY_NS = 86_400 * 10**9
+
+class Heatmap:
+    def __init__(self, values, week_starts):
+        # values: (7, weeks) float64 means, NaN where there is no entry
+        self.values = values
+        self.week_starts = week_starts
+        self.weekdays = WEEKDAYS
+
+    @property
+    def empty(self):
+        return self.values.size == 0 or bool(np.isnan(self.values).all())
+
+    def to_frame(self):
+        return pd.DataFrame(self.values, index=self.weekdays, columns=self.week_starts)
+
+def build_heatmap(dates, values, weeks=1):
+    # dates: datetime-like array, values: numeric array of the same length.
+    # The window ends at the latest date and covers `weeks` * 7 days.
+    ns = np.asarray(pd.to_datetime(dates, errors="coerce"), dtype="datetime64[ns]").view(np.int64)
+    values = np.asarray(values, dtype=np.float64)
+    valid = ns != np.iinfo(np.int64).min
+    days = ns // DAY_NS
+    if not valid.any():
+        return Heatmap(np.empty((7, 0)), [])
+    last = int(days[valid].max())
+    first = last - 7 * weeks + 1
+    if valid.all() and np.all(days[1:] >= days[:-1]):
+        # Chronological diary: binary-search the window start instead of scanning everything
+        start = int(np.searchsorted(days, first, side="left"))
+        days, values = days[start:], values[start:]
+    else:
+        keep = valid & (days >= first)
+        days, values = days[keep], values[keep]
+    keep = ~np.isnan(values)
+    days, values = days[keep], values[keep]
+
+    # Epoch day 0 (1970-01-01) was a Thursday, so Monday-based weekday is (day + 3) % 7
+    monday = first - (first + 3) % 7
+    offset = days - monday
+    week, weekday = offset // 7, offset % 7
+    n_weeks = int((last - monday) // 7) + 1
+    sums = np.zeros((7, n_weeks))
+    counts = np.zeros((7, n_weeks))
+    np.add.at(sums, (weekday, week), values)
+    np.add.at(counts, (weekday, week), 1)
+    with np.errstate(invalid="ignore"):
+        grid = sums / counts
+    week_starts = (np.datetime64("1970-01-01") + (monday + 7 * np.arange(n_weeks)).astype("timedelta64[D]")).tolist()
+    return Heatmap(grid, week_starts)
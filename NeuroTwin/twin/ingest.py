@@ -0,0 +1,106 @@
+import hashlib
+import io
+import time
+import tracemalloc
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+from twin.enrich import NOTE_COLUMN, score_notes
+from twin.stats import MoodAggregates
+
+# Compact dtypes for diary columns; free-text notes are skipped unless asked for
+DIARY_DTYPES = {"stress": "float32", "sleep_hours": "float32", "mood": "category"}
+STREAM_COLUMNS = ("date", "mood", "stress", "sleep_hours")
+STREAM_COLUMNS_WITH_NOTES = STREAM_COLUMNS + ("notes",)
+REQUIRED_COLUMNS = ("date", "mood", "stress", "sleep_hours")
+UPLOAD_COLUMNS = REQUIRED_COLUMNS + ("notes",)
+
+class IngestReport:
+    def __init__(self, rows, chunks, seconds, peak_chunk_bytes, peak_traced_bytes=None):
+        self.rows = rows
+        self.chunks = chunks
+        self.seconds = seconds
+        self.peak_chunk_bytes = peak_chunk_bytes
+        self.peak_traced_bytes = peak_traced_bytes
+
+    @property
+    def rows_per_sec(self):
+        return self.rows / self.seconds if self.seconds > 0 else float("inf")
+
+    def __repr__(self):
+        peak = self.peak_traced_bytes if self.peak_traced_bytes is not None else self.peak_chunk_bytes
+        return (f"IngestReport(rows={self.rows}, chunks={self.chunks}, "
+                f"rows/s={self.rows_per_sec:,.0f}, peak={peak / 2**20:.1f} MiB)")
+
+def stream_diary(path, chunksize=100_000, window=7, columns=STREAM_COLUMNS, trace_memory=False):
+    # Read a diary CSV chunk by chunk and fold it into MoodAggregates.
+    # Returns (aggregates, tail frame of the last `window` rows, IngestReport);
+    # the full file is never materialized. trace_memory=True measures the true
+    # Python/NumPy allocation peak with tracemalloc (slower), otherwise the peak
+    # is the largest chunk frame. If "notes" is among the columns, each chunk's
+    # notes are replaced by their distress score (twin.enrich) and folded into
+    # the note aggregates, so the free text never outlives its chunk.
+    wanted = set(columns)
+    stats = MoodAggregates(window=window)
+    tail = None
+    rows = chunks = peak_chunk = 0
+    if trace_memory:
+        tracemalloc.start()
+    started = time.perf_counter()
+    try:
+        reader = pd.read_csv(path, chunksize=chunksize, usecols=lambda c: c in wanted,
+                             dtype=DIARY_DTYPES)
+        for chunk in reader:
+            if "date" in chunk.columns:
+                chunk["date"] = pd.to_datetime(chunk["date"], errors="coerce")
+            stats.update_many(chunk["stress"].to_numpy(), chunk["sleep_hours"].to_numpy())
+            if "notes" in chunk.columns:
+                chunk[NOTE_COLUMN] = score_notes(chunk["notes"])
+                stats.update_notes(chunk[NOTE_COLUMN].to_numpy())
+                chunk = chunk.drop(columns="notes")
+            elif "notes" in wanted:
+                # Requested but absent: every row still counts, as a 0 score
+                stats.update_notes(np.zeros(len(chunk)))
+            if "mood" in chunk.columns:
+                stats.update_moods(chunk["mood"].value_counts())
+            tail = _append_tail(tail, chunk, window)
+            peak_chunk = max(peak_chunk, int(chunk.memory_usage(deep=True).sum()))
+            rows += len(chunk)
+            chunks += 1
+        seconds = time.perf_counter() - started
+        peak_traced = tracemalloc.get_traced_memory()[1] if trace_memory else None
+    finally:
+        if trace_memory:
+            tracemalloc.stop()
+
+    if tail is None:
+        tail = pd.DataFrame(columns=list(columns))
+    report = IngestReport(rows, chunks, seconds, peak_chunk, peak_traced)
+    return stats, tail.reset_index(drop=True), report
+
+def _append_tail(tail, chunk, window):
+    # Each chunk's mood categorical has only the moods that chunk saw; align the
+    # categories first or concat falls back to object dtype
+    chunk = chunk.tail(window)
+    if tail is None:
+        return chunk
+    if "mood" in chunk.columns and isinstance(chunk["mood"].dtype, pd.CategoricalDtype):
+        categories = union_categoricals([tail["mood"], chunk["mood"]], ignore_order=True).categories
+        tail = tail.assign(mood=tail["mood"].cat.set_categories(categories))
+        chunk = chunk.assign(mood=chunk["mood"].cat.set_categories(categories))
+    return pd.concat([tail, chunk]).tail(window)
+
+def upload_digest(payload):
+    return hashlib.blake2b(payload, digest_size=16).hexdigest()
+
+def parse_upload(payload):
+    # Parse and validate an uploaded diary CSV into the typed frame DigitalTwin expects
+    try:
+        df = pd.read_csv(io.BytesIO(payload), dtype=DIARY_DTYPES)
+    except (ValueError, pd.errors.ParserError) as e:
+        raise ValueError(f"Invalid CSV: {e}") from e
+    missing = [c for c in REQUIRED_COLUMNS if c not in df.columns]
+    if missing:
+        raise ValueError(f"CSV must have: {', '.join(REQUIRED_COLUMNS)} (missing {', '.join(missing)})")
+    df["date"] = pd.to_datetime(df["date"], errors="coerce")
+    return df[[c for c in UPLOAD_COLUMNS if c in df.columns]]
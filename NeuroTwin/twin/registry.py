@@ -0,0 +1,103 @@
+import os
+import threading
+from collections import OrderedDict
+from twin.builder import DigitalTwin
+from twin.ingest import parse_upload, upload_digest
+from twin.store import load_upload
+
+DEFAULT_MAX_BYTES = 256 * 2**20
+
+class TwinRegistry:
+    # Process-wide cache of diary frames keyed by patient/diary ID.
+    # Sessions get their own DigitalTwin (risk, live entries) over one shared,
+    # read-only frame; with pandas copy-on-write a session that edits its copy
+    # never touches the shared data. Idle diaries are evicted LRU-first once
+    # the total frame size exceeds max_bytes.
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.used_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._frames = OrderedDict()
+        self._lock = threading.Lock()
+
+    def frame(self, key, loader):
+        with self._lock:
+            if key in self._frames:
+                self._frames.move_to_end(key)
+                self.hits += 1
+                return self._frames[key][0]
+            self.misses += 1
+        # Load outside the lock so a slow diary does not stall other sessions
+        df = loader()
+        nbytes = int(df.memory_usage(deep=True).sum())
+        with self._lock:
+            if key not in self._frames:
+                self._frames[key] = (df, nbytes)
+                self.used_bytes += nbytes
+                self._evict()
+            else:
+                self._frames.move_to_end(key)
+            return self._frames[key][0]
+
+    def twin(self, mood_file, key=None, window=7, **load_kwargs):
+        # Keyed by file path + mtime unless an explicit patient/diary ID is given,
+        # so a rewritten diary is reloaded and the stale copy ages out
+        if key is None:
+            key = (os.path.abspath(mood_file), os.stat(mood_file).st_mtime_ns)
+        df = self.frame(key, lambda: DigitalTwin(mood_file, **load_kwargs).df)
+        return DigitalTwin(frame=df, window=window)
+
+    def upload_frame(self, payload, data_dir=None):
+        # Keyed by content hash: each unique upload is parsed and validated once,
+        # reruns and identical re-uploads cost a hash and a dict lookup. With a
+        # data_dir the upload is also persisted to the Parquet store under its
+        # digest, so other processes reload it instead of reparsing the CSV.
+        # Raises ValueError for a malformed diary.
+        digest = upload_digest(payload)
+        if data_dir is None:
+            return digest, self.frame(("upload", digest), lambda: parse_upload(payload))
+        return digest, self.frame(("upload", digest), lambda: load_upload(data_dir, digest, payload))
+
+    def upload(self, payload, window=7, data_dir=None):
+        digest, df = self.upload_frame(payload, data_dir=data_dir)
+        return digest, DigitalTwin(frame=df, window=window)
+
+    def invalidate(self, key):
+        with self._lock:
+            entry = self._frames.pop(key, None)
+            if entry is not None:
+                self.used_bytes -= entry[1]
+
+    def stats(self):
+        with self._lock:
+            return {
+                "diaries": len(self._frames),
+                "used_bytes": self.used_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+    def _evict(self):
+        # Always keep the most recently used diary, even if it alone exceeds the budget
+        while self.used_bytes > self.max_bytes and len(self._frames) > 1:
+            _, (_, nbytes) = self._frames.popitem(last=False)
+            self.used_bytes -= nbytes
+            self.evictions += 1
+
+_registry = None
+_registry_lock = threading.Lock()
+
+def get_registry(max_bytes=None):
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = TwinRegistry(max_bytes or DEFAULT_MAX_BYTES)
+        elif max_bytes is not None:
+            with _registry._lock:
+                _registry.max_bytes = max_bytes
+                _registry._evict()
+        return _registry
@@ -0,0 +1,90 @@
+from collections import deque
+import numpy as np
+
+class MoodAggregates:
+    # Running count / sum / sum of squares for stress and sleep, plus a last-N window.
+    # Every update is O(1) per entry, so risk can be refreshed without touching a DataFrame.
+    def __init__(self, window=7):
+        self.count = 0
+        self.stress_sum = 0.0
+        self.stress_sq_sum = 0.0
+        self.sleep_sum = 0.0
+        self.sleep_sq_sum = 0.0
+        self.note_count = 0
+        self.note_sum = 0.0
+        self.mood_counts = {}
+        self.window = deque(maxlen=window)
+
+    def update(self, stress, sleep):
+        stress = float(stress)
+        sleep = float(sleep)
+        self.count += 1
+        self.stress_sum += stress
+        self.stress_sq_sum += stress * stress
+        self.sleep_sum += sleep
+        self.sleep_sq_sum += sleep * sleep
+        self.window.append((stress, sleep))
+
+    def update_many(self, stress, sleep):
+        # Bulk path for whole columns or CSV chunks
+        stress = np.asarray(stress, dtype=np.float64)
+        sleep = np.asarray(sleep, dtype=np.float64)
+        valid = ~(np.isnan(stress) | np.isnan(sleep))
+        stress = stress[valid]
+        sleep = sleep[valid]
+        self.count += len(stress)
+        self.stress_sum += float(stress.sum())
+        self.stress_sq_sum += float(np.dot(stress, stress))
+        self.sleep_sum += float(sleep.sum())
+        self.sleep_sq_sum += float(np.dot(sleep, sleep))
+        tail = self.window.maxlen
+        self.window.extend(zip(stress[-tail:].tolist(), sleep[-tail:].tolist()))
+
+    def update_note(self, distress):
+        self.note_count += 1
+        self.note_sum += float(distress)
+
+    def update_notes(self, distress):
+        distress = np.asarray(distress, dtype=np.float64)
+        distress = distress[~np.isnan(distress)]
+        self.note_count += len(distress)
+        self.note_sum += float(distress.sum())
+
+    def update_moods(self, counts):
+        # counts: mood -> entries, e.g. a chunk's value_counts()
+        for mood, n in counts.items():
+            if n:
+                self.mood_counts[mood] = self.mood_counts.get(mood, 0) + int(n)
+
+    @property
+    def avg_stress(self):
+        return self.stress_sum / self.count if self.count else 0.0
+
+    @property
+    def avg_sleep(self):
+        return self.sleep_sum / self.count if self.count else 0.0
+
+    @property
+    def avg_note_distress(self):
+        return self.note_sum / self.note_count if self.note_count else 0.0
+
+    @property
+    def stress_std(self):
+        return self._std(self.stress_sum, self.stress_sq_sum)
+
+    @property
+    def sleep_std(self):
+        return self._std(self.sleep_sum, self.sleep_sq_sum)
+
+    def window_means(self):
+        if not self.window:
+            return 0.0, 0.0
+        stress, sleep = zip(*self.window)
+        return sum(stress) / len(stress), sum(sleep) / len(sleep)
+
+    def _std(self, total, sq_total):
+        if self.count < 2:
+            return 0.0
+        mean = total / self.count
+        var = (sq_total - self.count * mean * mean) / (self.count - 1)
+        return float(np.sqrt(max(var, 0.0)))
@@ -0,0 +1,89 @@
+import os
+import pandas as pd
+from twin.ingest import DIARY_DTYPES, UPLOAD_COLUMNS, parse_upload
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    PARQUET_AVAILABLE = True
+except ImportError:
+    PARQUET_AVAILABLE = False
+
+# Columnar diary store: one Parquet file per diary, sorted by date so the
+# row-group min/max statistics let date-range reads skip whole row groups.
+ROW_GROUP_SIZE = 64_000
+
+def parquet_path_for(csv_path):
+    return os.path.splitext(csv_path)[0] + ".parquet"
+
+def csv_to_parquet(csv_path, parquet_path=None):
+    if not PARQUET_AVAILABLE:
+        raise ImportError("pyarrow is required for the Parquet diary store")
+    parquet_path = parquet_path or parquet_path_for(csv_path)
+    df = pd.read_csv(csv_path, dtype={k: v for k, v in DIARY_DTYPES.items() if k != "mood"})
+    df["date"] = pd.to_datetime(df["date"], errors="coerce")
+    return write_parquet(df.sort_values("date", kind="stable").reset_index(drop=True), parquet_path)
+
+def write_parquet(df, parquet_path):
+    # df must already be sorted by date; written to a temp file and swapped in
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    # Dictionary-encode mood so it round-trips as a pandas categorical
+    if "mood" in table.column_names and not pa.types.is_dictionary(table.schema.field("mood").type):
+        idx = table.column_names.index("mood")
+        table = table.set_column(idx, "mood", table.column("mood").dictionary_encode())
+    tmp_path = parquet_path + ".tmp"
+    pq.write_table(table, tmp_path, row_group_size=ROW_GROUP_SIZE, compression="zstd")
+    os.replace(tmp_path, parquet_path)
+    return parquet_path
+
+def load_diary(path, columns=None, start=None, end=None):
+    # Memory-mapped read of only the requested columns and date range
+    filters = []
+    if start is not None:
+        filters.append(("date", ">=", pd.Timestamp(start)))
+    if end is not None:
+        filters.append(("date", "<=", pd.Timestamp(end)))
+    table = pq.read_table(path, columns=list(columns) if columns else None,
+                          filters=filters or None, memory_map=True)
+    return table.to_pandas()
+
+def save_upload(data_dir, name, payload):
+    # Persist an uploaded CSV once and return the path DigitalTwin should open.
+    # Re-uploads with identical bytes reuse the existing Parquet copy.
+    os.makedirs(data_dir, exist_ok=True)
+    csv_path = os.path.join(data_dir, f"uploaded_{name}")
+    unchanged = os.path.isfile(csv_path) and os.path.getsize(csv_path) == len(payload)
+    if unchanged:
+        with open(csv_path, "rb") as f:
+            unchanged = f.read() == payload
+    if not unchanged:
+        with open(csv_path, "wb") as f:
+            f.write(payload)
+    if not PARQUET_AVAILABLE:
+        return csv_path
+    store_path = parquet_path_for(csv_path)
+    if not unchanged or not os.path.isfile(store_path):
+        csv_to_parquet(csv_path, store_path)
+    return store_path
+
+def upload_store_path(data_dir, digest):
+    # Where load_upload keeps the Parquet copy of an upload under its digest
+    return os.path.join(data_dir, f"uploaded_{digest}.parquet")
+
+def load_upload(data_dir, digest, payload):
+    # Typed frame for an upload, persisted under its content digest. A digest
+    # already in the store (e.g. a returning user in a new process) is read back
+    # with load_diary without reparsing the CSV; a new one is parsed and
+    # validated once and that frame is written straight to Parquet (no CSV
+    # copy is kept). Raises ValueError for a malformed diary.
+    path = upload_store_path(data_dir, digest)
+    if PARQUET_AVAILABLE and os.path.isfile(path):
+        df = load_diary(path)
+        return df[[c for c in UPLOAD_COLUMNS if c in df.columns]]
+    df = parse_upload(payload)
+    if not PARQUET_AVAILABLE:
+        return df
+    # Sorted like the store so first load and reload return the same frame
+    df = df.sort_values("date", kind="stable").reset_index(drop=True)
+    os.makedirs(data_dir, exist_ok=True)
+    write_parquet(df, path)
+    return df
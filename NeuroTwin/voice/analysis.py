@@ -0,0 +1,135 @@
+import io
+import multiprocessing
+import os
+import queue
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+# Voice tone analysis off the Streamlit script thread. librosa is imported
+# lazily, and once per pool worker, so neither the dashboard's startup nor a
+# user's first recording pays its import/JIT cost. Long recordings are
+# analyzed block by block in the worker, which sends each provisional result
+# back over a queue for the dashboard to poll.
+DEFAULT_WORKERS = 2
+# NEUROTWIN_VOICE_WARMUP=0 skips the start-up warm-up (e.g. when benchmarking);
+# the pool then starts with the first recording
+WARMUP_ON_START = os.environ.get("NEUROTWIN_VOICE_WARMUP", "1") != "0"
+
+def classify_tone(avg_mfcc, avg_chroma, avg_centroid):
+    # Simple heuristic: higher pitch/energy might indicate anxiety
+    if avg_centroid > 2000 or avg_mfcc > 0:
+        return "anxious"
+    elif avg_chroma > 0.5:
+        return "calm"
+    return "depressed"
+
+def analyze_audio(audio_bytes):
+    import soundfile as sf
+    from voice.features import extract_features
+    from voice.stream import STREAM_THRESHOLD_SECONDS, analyze_stream
+    # Long recordings are analyzed block by block to keep worker memory bounded
+    if sf.info(io.BytesIO(audio_bytes)).duration > STREAM_THRESHOLD_SECONDS:
+        return analyze_stream(audio_bytes)
+    # Convert audio bytes to numpy array
+    audio_array, sample_rate = sf.read(io.BytesIO(audio_bytes), dtype="float32")
+    features = extract_features(audio_array, sample_rate)
+    features["tone"] = classify_tone(features["avg_mfcc"], features["avg_chroma"], features["avg_centroid"])
+    return features
+
+def stream_audio(audio_bytes, progress):
+    # Pool task for long recordings: every block's provisional result goes to `progress`
+    from voice.stream import iter_analysis
+    result = None
+    for result in iter_analysis(audio_bytes):
+        progress.put(result)
+    return result
+
+def _warm_worker():
+    # Pool initializer: pay librosa's import and numba JIT once per process
+    import numpy as np
+    import soundfile
+    from voice.features import extract_features
+    # 16 kHz input also exercises the resampler
+    extract_features(np.sin(np.linspace(0, 880 * np.pi, 16000)).astype(np.float32), 16000)
+
+def _noop():
+    return None
+
+class VoiceJob:
+    # Handle for one recording in the pool. Nothing here blocks unless result() is called
+    def __init__(self, future, progress=None):
+        self._future = future
+        self._progress = progress
+        self.partial = None
+
+    def done(self):
+        return self._future.done()
+
+    @property
+    def error(self):
+        return self._future.exception() if self._future.done() else None
+
+    def poll(self):
+        # Latest provisional result from a streaming job (None before the first block)
+        while self._progress is not None:
+            try:
+                self.partial = self._progress.get_nowait()
+            except queue.Empty:
+                break
+        return self.partial
+
+    def result(self, timeout=None):
+        return self._future.result(timeout=timeout)
+
+class VoiceAnalyzer:
+    def __init__(self, max_workers=DEFAULT_WORKERS):
+        self.max_workers = max_workers
+        # spawn, not fork: forking a threaded Streamlit server is unsafe
+        self._context = multiprocessing.get_context("spawn")
+        self._pool = ProcessPoolExecutor(max_workers=max_workers, initializer=_warm_worker,
+                                         mp_context=self._context)
+        self._manager = None
+        self._manager_lock = threading.Lock()
+
+    def warm(self):
+        # Start every worker now instead of on the first recordings
+        return [self._pool.submit(_noop) for _ in range(self.max_workers)]
+
+    def submit(self, audio_bytes):
+        # Returns a concurrent.futures.Future resolving to the analyze_audio() dict
+        return self._pool.submit(analyze_audio, bytes(audio_bytes))
+
+    def analyze(self, audio_bytes):
+        # VoiceJob for the dashboard: recordings over STREAM_THRESHOLD_SECONDS are
+        # streamed so poll() has a provisional tone while the worker is still going.
+        # Only the WAV header is read here (soundfile), never librosa.
+        from voice.stream import STREAM_THRESHOLD_SECONDS, recording_duration
+        audio_bytes = bytes(audio_bytes)
+        if recording_duration(audio_bytes) <= STREAM_THRESHOLD_SECONDS:
+            return VoiceJob(self.submit(audio_bytes))
+        progress = self._progress_queue()
+        return VoiceJob(self._pool.submit(stream_audio, audio_bytes, progress), progress)
+
+    def shutdown(self, wait=True):
+        self._pool.shutdown(wait=wait)
+        if self._manager is not None:
+            self._manager.shutdown()
+
+    def _progress_queue(self):
+        # Pool tasks can only be handed proxy queues; the manager process starts on
+        # the first long recording
+        with self._manager_lock:
+            if self._manager is None:
+                self._manager = self._context.Manager()
+            return self._manager.Queue()
+
+_analyzer = None
+_analyzer_lock = threading.Lock()
+
+def get_voice_analyzer(max_workers=DEFAULT_WORKERS):
+    global _analyzer
+    with _analyzer_lock:
+        if _analyzer is None:
+            _analyzer = VoiceAnalyzer(max_workers)
+            _analyzer.warm()
+        return _analyzer
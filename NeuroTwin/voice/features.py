@@ -0,0 +1,41 @@
+import numpy as np
+
+# Single-STFT voice features: the signal is downmixed, resampled to one
+# fixed rate and transformed once; MFCC, chroma and spectral centroid are
+# all derived from that spectrogram (float32 throughout).
+TARGET_SR = 22050
+N_FFT = 2048
+HOP_LENGTH = 512
+N_MFCC = 13
+
+def prepare_signal(y, sr, target_sr=TARGET_SR):
+    import librosa
+    y = np.asarray(y, dtype=np.float32)
+    if y.ndim == 2:
+        # soundfile returns (frames, channels)
+        y = y.mean(axis=1, dtype=np.float32)
+    if target_sr and sr != target_sr:
+        y = librosa.resample(y, orig_sr=sr, target_sr=target_sr).astype(np.float32, copy=False)
+        sr = target_sr
+    return y, sr
+
+def spectral_features(y, sr):
+    # Everything from one STFT of an already prepared mono signal
+    import librosa
+    magnitude = np.abs(librosa.stft(y, n_fft=N_FFT, hop_length=HOP_LENGTH, dtype=np.complex64))
+    power = magnitude ** 2
+    mel = librosa.feature.melspectrogram(S=power, sr=sr, n_fft=N_FFT)
+    mfcc = librosa.feature.mfcc(S=librosa.power_to_db(mel), n_mfcc=N_MFCC)
+    chroma = librosa.feature.chroma_stft(S=power, sr=sr, n_fft=N_FFT)
+    centroid = librosa.feature.spectral_centroid(S=magnitude, sr=sr, n_fft=N_FFT)
+    return mfcc, chroma, centroid
+
+def extract_features(y, sr, target_sr=TARGET_SR):
+    y, sr = prepare_signal(y, sr, target_sr)
+    mfcc, chroma, centroid = spectral_features(y, sr)
+    return {
+        "avg_mfcc": float(np.mean(mfcc)),
+        "avg_chroma": float(np.mean(chroma)),
+        "avg_centroid": float(np.mean(centroid)),
+        "duration": len(y) / sr,
+    }
@@ -0,0 +1,77 @@
+import io
+import numpy as np
+from voice.analysis import classify_tone
+from voice.features import TARGET_SR, prepare_signal, spectral_features
+
+# Block-wise analysis for long voice journals: decode a fixed number of
+# seconds at a time, fold each block's frames into running statistics and
+# yield a provisional tone. Peak memory follows block_seconds, not the
+# recording length.
+BLOCK_SECONDS = 10.0
+STREAM_THRESHOLD_SECONDS = 60.0
+
+class RunningFeatureStats:
+    # Frame-weighted mean/variance per feature, merged block by block (Chan et al.)
+    def __init__(self):
+        self.count = {}
+        self.mean = {}
+        self.m2 = {}
+
+    def update(self, name, values):
+        values = np.asarray(values, dtype=np.float64).ravel()
+        n = values.size
+        if n == 0:
+            return
+        block_mean = float(values.mean())
+        block_m2 = float(((values - block_mean) ** 2).sum())
+        count = self.count.get(name, 0)
+        mean = self.mean.get(name, 0.0)
+        total = count + n
+        delta = block_mean - mean
+        self.count[name] = total
+        self.mean[name] = mean + delta * n / total
+        self.m2[name] = self.m2.get(name, 0.0) + block_m2 + delta * delta * count * n / total
+
+    def get(self, name):
+        return self.mean.get(name, 0.0)
+
+    def std(self, name):
+        count = self.count.get(name, 0)
+        return float(np.sqrt(self.m2[name] / (count - 1))) if count > 1 else 0.0
+
+def recording_duration(audio_bytes):
+    import soundfile as sf
+    return sf.info(io.BytesIO(audio_bytes)).duration
+
+def iter_analysis(source, block_seconds=BLOCK_SECONDS, target_sr=TARGET_SR):
+    # source: audio bytes, a path, or a file-like object
+    import soundfile as sf
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        source = io.BytesIO(bytes(source))
+    stats = RunningFeatureStats()
+    seconds = 0.0
+    with sf.SoundFile(source) as audio:
+        blocksize = max(int(block_seconds * audio.samplerate), 1)
+        for block in audio.blocks(blocksize=blocksize, dtype="float32", always_2d=True):
+            seconds += len(block) / audio.samplerate
+            y, sr = prepare_signal(block, audio.samplerate, target_sr)
+            mfcc, chroma, centroid = spectral_features(y, sr)
+            # MFCC means are taken per frame (over coefficients) so frames weigh equally
+            stats.update("mfcc", mfcc.mean(axis=0))
+            stats.update("chroma", chroma.mean(axis=0))
+            stats.update("centroid", centroid)
+            features = {
+                "avg_mfcc": stats.get("mfcc"),
+                "avg_chroma": stats.get("chroma"),
+                "avg_centroid": stats.get("centroid"),
+                "centroid_std": stats.std("centroid"),
+                "duration": seconds,
+            }
+            features["tone"] = classify_tone(features["avg_mfcc"], features["avg_chroma"], features["avg_centroid"])
+            yield features
+
+def analyze_stream(source, block_seconds=BLOCK_SECONDS, target_sr=TARGET_SR):
+    result = None
+    for result in iter_analysis(source, block_seconds, target_sr):
+        pass
+    return result
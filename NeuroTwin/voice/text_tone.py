@@ -0,0 +1,67 @@
+import functools
+import json
+import os
+import re
+import numpy as np
+import pandas as pd
+
+# Deterministic text tone scoring: one compiled, word-bounded regex over a
+# weighted lexicon (config/tone_lexicon.json). Longer phrases are tried
+# first, so "panic attack" wins over "panic".
+LEXICON_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "config", "tone_lexicon.json")
+TONES = ("anxious", "depressed", "calm")
+NEUTRAL = "neutral"
+
+class ToneLexicon:
+    def __init__(self, weights):
+        self.tones = tuple(weights)
+        self.terms = {}
+        for tone, terms in weights.items():
+            for term, weight in terms.items():
+                self.terms[term.lower()] = (tone, float(weight))
+        alternatives = sorted(self.terms, key=len, reverse=True)
+        self.pattern = re.compile(r"\b(?:" + "|".join(re.escape(t) for t in alternatives) + r")\b", re.IGNORECASE)
+
+    def score(self, text):
+        scores = dict.fromkeys(self.tones, 0.0)
+        if not isinstance(text, str):
+            # Missing diary notes arrive as NaN
+            return scores
+        for match in self.pattern.findall(text):
+            tone, weight = self.terms[match.lower()]
+            scores[tone] += weight
+        return scores
+
+    def classify(self, text):
+        scores = self.score(text)
+        return _pick(scores, self.tones), scores
+
+    def score_many(self, texts):
+        # Batch scoring: one regex pass per text, then a vectorized weight lookup
+        texts = pd.Series(texts, copy=False).fillna("").astype(str)
+        matches = texts.str.lower().str.findall(self.pattern).explode().dropna()
+        scores = pd.DataFrame(0.0, index=texts.index, columns=list(self.tones))
+        if len(matches):
+            tone = matches.map(lambda m: self.terms[m][0])
+            weight = matches.map(lambda m: self.terms[m][1]).astype(float)
+            summed = weight.groupby([matches.index, tone.to_numpy()]).sum().unstack(fill_value=0.0)
+            scores.loc[summed.index, summed.columns] = summed.to_numpy()
+        values = scores[list(self.tones)].to_numpy()
+        scores["tone"] = np.where(values.max(axis=1) > 0, np.array(self.tones)[values.argmax(axis=1)], NEUTRAL)
+        return scores
+
+def distress_from_scores(anxious, depressed, calm):
+    # Signed note distress in [-1, 1]: negative for calm notes, positive for anxious/depressed ones
+    return np.tanh((np.asarray(anxious) + np.asarray(depressed) - np.asarray(calm)) / 2.0)
+
+def _pick(scores, tones):
+    best = max(tones, key=lambda t: scores[t])
+    return best if scores[best] > 0 else NEUTRAL
+
+@functools.lru_cache(maxsize=4)
+def load_lexicon(path=LEXICON_PATH):
+    with open(path, encoding="utf-8") as f:
+        return ToneLexicon(json.load(f))
+
+def detect_tone(text):
+    return load_lexicon().classify(text)[0]
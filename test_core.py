@@ -0,0 +1,69 @@
+"""
+NeuroTwin core engine tests
+Checks the headless pipeline shared by both dashboards
+"""
+
+import sys
+import os
+import subprocess
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'NeuroTwin'))
+
+from core import engine
+
+SAMPLE_CSV = os.path.join(os.path.dirname(__file__), 'NeuroTwin', 'data', 'sample_mood_log.csv')
+
+
+def test_engine_imports_without_streamlit_or_plotly():
+    """The core engine is headless: importing it pulls in neither Streamlit nor plotly"""
+    code = ("import sys; sys.path.insert(0, 'NeuroTwin'); from core import engine; "
+            "print('streamlit' in sys.modules, 'plotly' in sys.modules)")
+    out = subprocess.run([sys.executable, "-c", code], cwd=os.path.dirname(os.path.abspath(__file__)),
+                         capture_output=True, text=True, check=True).stdout.split()
+    assert out == ["False", "False"]
+
+
+def test_risk_summary_and_specs_match_the_dashboards():
+    """Risk, trend, heatmap and brain spec come from one pipeline"""
+    payload = open(SAMPLE_CSV, "rb").read()
+    digest, frame = engine.ingest_upload(payload)
+    diary = engine.new_diary(frame)
+    summary = engine.risk_summary(diary.frame())
+
+    df = pd.read_csv(SAMPLE_CSV)
+    # Note distress is stored but carries no weight by default
+    assert summary["note_distress"] != 0
+    expected = np.clip(40 + df["stress"].mean() * 6.2 - df["sleep_hours"].mean() * 3.8, 0, 100)
+    assert summary["risk"] == round(float(expected), 1) and summary["entries"] == len(df)
+    assert engine.risk_summary(df.iloc[:0])["risk"] == 0.0
+    # A Diary serves the same summary from its derived cache until it changes
+    assert engine.risk_summary(diary) is engine.risk_summary(diary) and engine.risk_summary(diary) == summary
+    diary.append(9.0, 3.0, mood="anxious")
+    assert engine.risk_summary(diary)["entries"] == len(df) + 1
+
+    assert engine.trend(diary) is engine.trend(diary)
+    # The chart's pixel width sets the LTTB point budget
+    long = pd.DataFrame({"date": pd.date_range("2020-01-01", periods=2000, freq="D"),
+                         "stress": np.tile([2.0, 9.0], 1000), "sleep_hours": 7.0})
+    assert len(engine.trend(long, freq="day", width=600)) == 300
+    assert len(engine.trend(long, freq="day", width=2000)) == 1000
+    assert np.allclose(engine.heatmap(diary, weeks=4).values, engine.heatmap(diary.frame(), weeks=4).values,
+                       equal_nan=True)
+
+    spec = engine.render_spec(82.04)
+    fig = engine.brain_figure(82.04)
+    assert spec["alert"] and spec["risk"] == 82.0
+    assert [r["color"] for r in spec["regions"]] == list(fig.data[0].marker.color)
+    assert spec["regions"][1]["activity"] == 18.0
+
+
+def test_class_dashboard_shows_the_engine_risk():
+    """dashboard/app.py reports engine.risk_summary for its diary, not the noisy twin build"""
+    from streamlit.testing.v1 import AppTest
+    app = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'NeuroTwin', 'dashboard', 'app.py')
+    at = AppTest.from_file(app, default_timeout=120).run()
+    assert not at.exception
+    expected = engine.risk_summary(at.session_state.diary.frame())["risk"]
+    assert at.metric[0].value == f"{expected}%"
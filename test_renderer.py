@@ -0,0 +1,67 @@
+"""
+NeuroTwin brain renderer tests
+Checks figure construction and caching without a running Streamlit server
+"""
+
+import sys
+import os
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'NeuroTwin'))
+
+from brain import renderer
+
+
+def test_render_brain_is_memoized_by_quantized_risk():
+    """Reruns with the same (quantized) risk reuse the figure"""
+    fig = renderer.render_brain(82)
+    assert renderer.render_brain(82.0) is fig
+    assert renderer.render_brain(82.04) is fig
+    assert renderer.render_brain(60) is not fig
+
+    assert "Depression Risk: 82%" in fig.layout.title.text
+    assert fig.data[0].marker.color[1] == 'red'
+
+    before = renderer.cache_info()["figure"].hits
+    renderer.render_brain(82.0)
+    assert renderer.cache_info()["figure"].hits == before + 1
+
+
+def test_mesh_lod_cache_and_color_only_updates(tmp_path, monkeypatch):
+    """LODs are precomputed near their face budget, memory-mapped, and only colors vary with risk"""
+    import pytest
+    from brain import mesh
+    monkeypatch.setattr(mesh, "CACHE_DIR", str(tmp_path))
+    monkeypatch.setattr(mesh, "LOD_DIR", str(tmp_path / "shipped"))
+    mesh.load_lod.cache_clear()
+
+    # Nothing is decimated at request time
+    with pytest.raises(FileNotFoundError, match="python -m brain.mesh"):
+        mesh.load_lod("low")
+    assert len(mesh.build_lods(["low"])) == 3
+    vertices, faces, regions = mesh.load_lod("low")
+    assert isinstance(vertices, np.memmap)
+    assert abs(len(faces) - mesh.LOD_TARGET_FACES["low"]) <= 0.1 * mesh.LOD_TARGET_FACES["low"]
+    assert vertices.dtype.name == "float32" and faces.max() < len(vertices)
+    # A missing finer LOD is served from the nearest coarser one
+    assert len(mesh.load_lod("high")[1]) == len(faces)
+
+    calm = renderer.mesh_color_update(20, "low")["intensity"][0]
+    crisis = renderer.mesh_color_update(90, "low")["intensity"][0]
+    assert calm.shape == (len(vertices),) and crisis.max() == 90
+
+    fig = renderer.render_brain_mesh(20, "low")
+    x = fig.data[0].x
+    assert renderer.recolor_brain_mesh(fig, 90, "low") is fig
+    assert fig.data[0].x is x and np.array_equal(fig.data[0].intensity, crisis)
+    assert "90" in fig.layout.title.text
+
+    assert mesh.choose_lod(client="mobile") == "low"
+    # Only built LODs are chosen: finer requests are capped at the finest one on disk
+    assert mesh.choose_lod(viewport_width=1280) == "low"
+    monkeypatch.undo()
+    mesh.load_lod.cache_clear()
+    assert mesh.choose_lod(viewport_width=1280) == "medium"
+    assert mesh.choose_lod(viewport_width=1920, pixel_ratio=2) == ("high" if mesh.lod_available("high") else "medium")
+    # The procedural low/medium LODs ship with the package
+    assert len(mesh.load_lod("medium")[1]) > len(mesh.load_lod("low")[1])
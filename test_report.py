@@ -0,0 +1,76 @@
+"""
+NeuroTwin report pipeline tests
+Checks background PDF generation without a running Streamlit server
+"""
+
+import sys
+import os
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'NeuroTwin'))
+
+from report.worker import ReportWorker, build_pdf
+
+
+def test_report_jobs_return_in_memory_pdfs():
+    """Each job returns its own PDF bytes through a pollable handle"""
+    worker = ReportWorker(max_workers=2, warm=False)
+    try:
+        jobs = [worker.submit(risk, 6.0, 6.5) for risk in (40.0, 82.5)]
+        pdfs = [job.result(timeout=30) for job in jobs]
+    finally:
+        worker.shutdown()
+
+    assert all(job.status == "done" and job.error is None for job in jobs)
+    assert all(pdf.startswith(b"%PDF-") for pdf in pdfs)
+    assert pdfs[0] != pdfs[1]
+    assert worker.get(jobs[0].id) is jobs[0]
+
+
+def test_build_pdf_embeds_snapshot_when_available():
+    """A PNG snapshot makes the report larger than the text-only version"""
+    import base64
+    png = base64.b64decode(
+        "iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJAAAADUlEQVR42mP8z8DwHwAFBQIAX8jx0gAAAABJRU5ErkJggg=="
+    )
+    assert len(build_pdf(80, 7, 5, png=png)) > len(build_pdf(80, 7, 5))
+
+
+def test_cohort_cli_generates_and_resumes(tmp_path):
+    """One PDF per diary, reproducible risk, and a rerun skips finished reports"""
+    import shutil
+    import pytest
+    from report.cohort import find_diaries, run_cohort, write_report
+
+    data_dir = os.path.join(os.path.dirname(__file__), 'NeuroTwin', 'data')
+    diaries = tmp_path / "diaries"
+    diaries.mkdir()
+    for name in ("sample_mood_log.csv", "uploaded_test_mood_log.csv", "uploaded_test_mood_log_low.csv"):
+        shutil.copy(os.path.join(data_dir, name), diaries / name)
+    out = tmp_path / "reports"
+
+    logs = []
+    first = run_cohort(str(diaries), str(out), workers=2, log=logs.append)
+    assert first["generated"] == 3 and first["failed"] == 0
+    assert sorted(p.name for p in out.glob("*.pdf")) == [
+        "sample_mood_log.pdf", "uploaded_test_mood_log.pdf", "uploaded_test_mood_log_low.pdf"]
+    assert "reports/s" in logs[-1]
+
+    (out / "sample_mood_log.pdf").unlink()
+    second = run_cohort(str(diaries), str(out), workers=1, log=logs.append)
+    assert second["generated"] == 1 and second["skipped"] == 2
+
+    # Same file name in two folders: two patients, two reports
+    (diaries / "site_b").mkdir()
+    shutil.copy(diaries / "sample_mood_log.csv", diaries / "site_b" / "sample_mood_log.csv")
+    third = run_cohort(str(diaries), str(out), workers=1, log=logs.append)
+    assert third["generated"] == 1 and third["skipped"] == 3
+    assert (out / "site_b" / "sample_mood_log.pdf").is_file()
+
+    # Same stem in one folder is ambiguous
+    shutil.copy(diaries / "sample_mood_log.csv", diaries / "site_b" / "sample_mood_log.parquet")
+    with pytest.raises(ValueError, match="site_b/sample_mood_log"):
+        find_diaries(str(diaries))
+
+    risk_a = write_report("p1", str(diaries / "sample_mood_log.csv"), str(out), seed=3)[1]
+    risk_b = write_report("p1", str(diaries / "sample_mood_log.csv"), str(out), seed=3)[1]
+    assert risk_a == risk_b
@@ -0,0 +1,157 @@
+"""
+NeuroTwin risk model tests
+Checks the predictor package without a running Streamlit server
+"""
+
+import sys
+import os
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'NeuroTwin'))
+
+from predictor.risk import predict_depression, predict_depression_batch, daily_risk
+
+
+def test_batch_matches_scalar_for_same_seed():
+    """Row i of a batch equals the i-th scalar call on an identically seeded Generator"""
+    stress = np.array([3.2, 7.8, 4.1, 8.5, 9.9])
+    sleep = np.array([7.5, 5.2, 6.8, 4.9, 1.0])
+
+    batch = predict_depression_batch(stress, sleep, rng=np.random.default_rng(7))
+    scalar_rng = np.random.default_rng(7)
+    scalar = [predict_depression(s, h, rng=scalar_rng) for s, h in zip(stress, sleep)]
+
+    assert np.allclose(batch, scalar)
+
+
+def test_note_weight_is_opt_in(monkeypatch):
+    """Note distress leaves the risk unchanged unless a note weight is configured"""
+    from predictor import risk
+    assert risk.NOTE_WEIGHT == 0.0
+    assert risk.expected_risk(5.0, 7.0, note_distress=0.8) == risk.expected_risk(5.0, 7.0)
+    monkeypatch.setattr(risk, "NOTE_WEIGHT", 6.0)
+    assert np.isclose(risk.expected_risk(5.0, 7.0, note_distress=0.5), risk.expected_risk(5.0, 7.0) + 3.0)
+
+
+def test_batch_accepts_dataframe_and_clips():
+    """DataFrame input uses the diary column names and clips to 0-100"""
+    frame = pd.DataFrame({"stress": [0.0, 10.0, 20.0], "sleep_hours": [12.0, 0.0, 0.0]})
+    risk = predict_depression_batch(frame, rng=np.random.default_rng(0))
+
+    assert risk.shape == (3,)
+    assert risk.min() >= 0 and risk.max() <= 100
+    assert risk[0] == 0 and risk[2] == 100
+
+
+def test_daily_risk_vectorized_and_rolling():
+    """daily_risk matches the per-row formula and supports entry and calendar windows"""
+    frame = pd.DataFrame({
+        "date": ["2025-11-01", "2025-11-02", "2025-11-10", "2025-11-11"],
+        "stress": [2.0, 8.0, 5.0, 9.0],
+        "sleep_hours": [8.0, 4.0, 7.0, 3.0],
+    })
+    expected = np.clip(40 + frame["stress"] * 6.2 - frame["sleep_hours"] * 3.8, 0, 100)
+    assert np.allclose(daily_risk(frame), expected)
+
+    assert np.allclose(daily_risk(frame, window=2), expected.rolling(2, min_periods=1).mean())
+
+    weekly = daily_risk(frame, window="7D")
+    assert np.isclose(weekly.iloc[1], expected.iloc[:2].mean())
+    assert np.isclose(weekly.iloc[2], expected.iloc[2])
+
+
+def test_trend_resamples_and_downsamples_long_histories():
+    """Multi-year diaries come back as at most `points` chart points, cached per version"""
+    from predictor.trend import build_trend, lttb
+    n = 4 * 365 * 6
+    rng = np.random.default_rng(3)
+    df = pd.DataFrame({
+        "date": pd.date_range("2020-01-01", periods=n, freq="6h"),
+        "stress": rng.uniform(1, 10, n),
+        "sleep_hours": rng.uniform(3, 9, n),
+    })
+
+    weekly = build_trend(df, freq="week", points=10_000)
+    assert len(weekly) == len(df.set_index("date").resample("W").size())
+    daily = build_trend(df, freq="day", points=400)
+    assert len(daily) == 400 and daily.index.is_monotonic_increasing
+    assert len(build_trend(df, points=400)) <= 400
+
+    y = np.sin(np.arange(1000) / 40)
+    keep = lttb(np.arange(1000), y, 50)
+    assert keep[0] == 0 and keep[-1] == 999 and np.all(np.diff(keep) > 0)
+    assert y[keep].max() > 0.95 and y[keep].min() < -0.95
+
+
+def test_coalescer_batches_concurrent_callers():
+    """Requests from many threads resolve from a few vectorized predict calls"""
+    import pytest
+    from concurrent.futures import ThreadPoolExecutor
+    from predictor.coalescer import CoalescerFull, RiskCoalescer
+    calls = []
+
+    def predict(stress, sleep, note_distress=None):
+        calls.append(len(stress))
+        return predict_depression_batch(stress, sleep, rng=np.random.default_rng(0), note_distress=note_distress)
+
+    coalescer = RiskCoalescer(max_batch=64, max_wait_ms=20, predict=predict)
+    with ThreadPoolExecutor(16) as pool:
+        risks = list(pool.map(lambda i: coalescer.predict(1 + i % 10, 6.0), range(400)))
+    coalescer.close()
+
+    assert len(risks) == 400 and all(0 <= r <= 100 for r in risks)
+    assert sum(calls) == 400 and max(calls) <= 64 and len(calls) < 100
+    stats = coalescer.stats()
+    assert stats["items"] == 400 and stats["batches"] == len(calls)
+    assert stats["queue_wait_ms"]["count"] == 400 and stats["queue_wait_ms"]["p50"] <= 25
+
+    full = RiskCoalescer(max_wait_ms=1000, max_pending=1)
+    full.submit(5, 6)
+    with pytest.raises(CoalescerFull):
+        full.submit(5, 6)
+    full.close()
+    assert full.stats()["rejected"] == 1 and full.stats()["items"] == 1
+
+
+def test_model_registry_linear_matches_expected_risk_and_weights_mmap(tmp_path, monkeypatch):
+    """The linear model reproduces expected_risk; saved weights load back memory-mapped"""
+    import pytest
+    from predictor import models
+    from predictor.models import MODELS, RiskModel, load_model, load_weights, save_weights, sequence_tensor
+    from predictor.risk import expected_risk
+    assert {"linear", "gru"} <= set(MODELS)
+    with pytest.raises(ValueError):
+        load_model("transformer")
+
+    dates = pd.date_range("2024-01-01", periods=10, freq="D")
+    frames = [pd.DataFrame({"date": dates[-n:], "stress": np.linspace(2, 9, n), "sleep_hours": np.linspace(8, 5, n)})
+              for n in (10, 3)]
+    x, lengths = sequence_tensor(frames, days=7)
+    assert x.shape == (2, 7, 3) and lengths.tolist() == [7, 3]
+    assert np.all(x[1, :4] == 0)
+
+    risk = load_model("linear").predict(x, lengths)
+    expected = [expected_risk(f["stress"].tail(7).mean(), f["sleep_hours"].tail(7).mean()) for f in frames]
+    assert np.allclose(risk, expected, atol=1e-3)
+
+    gru_cls = MODELS["gru"]
+    path = save_weights(str(tmp_path / "gru.npz"), **gru_cls.default_weights(hidden=8))
+    weights = load_weights(path)
+    assert isinstance(weights["U"], np.memmap) and weights["U"].shape == (8, 24)
+    gru = load_model("gru", path)
+    assert gru is load_model("gru", path)
+    out = gru.predict(x, lengths)
+    assert out.shape == (2,) and np.all((out >= 0) & (out <= 100))
+    # Leading padding days do not move the recurrent state
+    assert np.allclose(gru.predict(x[1:, 4:], [3]), out[1:], atol=1e-5)
+
+    # Untrained seeded weights are never served implicitly, and the ABC cannot be used directly
+    with pytest.raises(ValueError, match="weights"):
+        load_model("gru")
+    with pytest.raises(TypeError):
+        RiskModel({})
+
+    from core import engine
+    monkeypatch.setattr(models, "MODEL_NAME", "gru")
+    assert np.allclose(engine.model_risk(frames, path=path, days=7), out)
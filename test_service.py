@@ -0,0 +1,49 @@
+"""
+NeuroTwin scoring service tests
+Exercises the HTTP endpoints with Starlette's in-process test client
+"""
+
+import sys
+import os
+import numpy as np
+from starlette.testclient import TestClient
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'NeuroTwin'))
+
+from service.app import create_app
+from predictor.risk import expected_risk, NOISE_RANGE
+
+
+def test_score_endpoints_and_metrics():
+    """Single, diary and batch scoring agree with the risk model; metrics record latency"""
+    with TestClient(create_app()) as client:
+        single = client.post("/score", json={"avg_stress": 8.5, "avg_sleep": 4.2}).json()
+        assert abs(single["risk"] - expected_risk(8.5, 4.2)) <= NOISE_RANGE + 0.05
+
+        entries = [{"stress": 9, "sleep_hours": 3.0, "notes": "panic attack"},
+                   {"stress": 8, "sleep_hours": 4.0, "notes": "can't focus"}]
+        diary = client.post("/score", json={"entries": entries}).json()
+        assert diary["entries"] == 2 and diary["avg_stress"] == 8.5 and diary["note_distress"] > 0
+
+        patients = [{"avg_stress": s, "avg_sleep": 6.0} for s in np.linspace(1, 10, 50)]
+        results = client.post("/score/batch", json={"patients": patients}).json()["results"]
+        assert len(results) == 50 and all(0 <= r["risk"] <= 100 for r in results)
+
+        spec = client.get("/brain-spec", params={"risk": 82}).json()
+        assert spec["alert"] and spec["regions"][1]["name"] == "Amygdala"
+
+        assert client.post("/score", json={"avg_stress": 5}).status_code == 400
+        assert client.post("/score", json={"entries": [{"stress": 5}]}).status_code == 400
+        assert client.get("/brain-spec").status_code == 400
+        # Non-finite numbers and diaries without usable rows are client errors, not 500s
+        assert client.post("/score", json={"avg_stress": "nan", "avg_sleep": 6}).status_code == 400
+        assert client.post("/score/batch", json={"patients": [{"avg_stress": 5, "avg_sleep": "inf"}]}).status_code == 400
+        assert client.get("/brain-spec", params={"risk": "nan"}).status_code == 400
+        empty = [{"stress": None, "sleep_hours": None}, {"stress": None, "sleep_hours": None}]
+        assert client.post("/score", json={"entries": empty}).status_code == 400
+        assert client.post("/score", json={"entries": [{"stress": "inf", "sleep_hours": 6}]}).status_code == 400
+
+        metrics = client.get("/metrics").json()
+        assert metrics["latency_ms"]["/score"]["count"] == 7
+        assert metrics["coalescer"]["items"] == 2 and metrics["batch_request_size"]["count"] == 1
+
@@ -0,0 +1,37 @@
+"""
+NeuroTwin text tone tests
+Checks the lexicon matcher without a running Streamlit server
+"""
+
+import sys
+import os
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'NeuroTwin'))
+
+from voice.text_tone import ToneLexicon, detect_tone, load_lexicon
+
+
+def test_detect_tone_is_deterministic_and_word_bounded():
+    """Same text, same tone; partial words do not match"""
+    assert detect_tone("I'm feeling really stressed today") == "anxious"
+    assert detect_tone("Feeling hopeless and sad") == "depressed"
+    assert detect_tone("Calm and happy after a walk") == "calm"
+    assert detect_tone("The weather is cloudy") == "neutral"
+    assert detect_tone("badminton practice") == "neutral"
+    assert {detect_tone("so-so day") for _ in range(5)} == {"neutral"}
+
+
+def test_weights_and_longest_phrase_win():
+    """Weighted phrases outscore single words and longer phrases match first"""
+    lexicon = ToneLexicon({"anxious": {"panic": 1.0, "panic attack": 3.0}, "calm": {"good": 1.0}})
+    assert lexicon.score("panic attack but good")["anxious"] == 3.0
+    assert lexicon.classify("good good")[0] == "calm"
+
+
+def test_score_many_matches_single_scoring():
+    """Batch scoring of a notes column agrees with per-text scoring"""
+    notes = pd.Series(["panic attack", "good day", None, "feeling hopeless", "normal"])
+    batch = load_lexicon().score_many(notes)
+    assert list(batch["tone"]) == [load_lexicon().classify(n)[0] for n in notes]
+    assert batch.loc[0, "anxious"] == load_lexicon().score("panic attack")["anxious"]
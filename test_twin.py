@@ -0,0 +1,285 @@
+"""
+NeuroTwin digital twin tests
+Checks twin building and diary handling without a running Streamlit server
+"""
+
+import sys
+import os
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'NeuroTwin'))
+
+from twin.builder import DigitalTwin
+from twin.stats import MoodAggregates
+from twin.store import save_upload
+from twin.registry import TwinRegistry
+
+SAMPLE_CSV = os.path.join(os.path.dirname(__file__), 'NeuroTwin', 'data', 'sample_mood_log.csv')
+
+
+def test_aggregates_match_pandas():
+    """Running aggregates agree with full-column pandas statistics"""
+    df = pd.read_csv(SAMPLE_CSV)
+    stats = MoodAggregates(window=3)
+    stats.update_many(df['stress'].iloc[:2], df['sleep_hours'].iloc[:2])
+    for stress, sleep in zip(df['stress'].iloc[2:], df['sleep_hours'].iloc[2:]):
+        stats.update(stress, sleep)
+
+    assert stats.count == len(df)
+    assert np.isclose(stats.avg_stress, df['stress'].mean())
+    assert np.isclose(stats.sleep_std, df['sleep_hours'].std())
+    assert np.isclose(stats.window_means()[0], df['stress'].tail(3).mean())
+
+
+def test_append_entry_updates_risk_incrementally():
+    """append_entry folds live rows into the aggregates without touching twin.df"""
+    twin = DigitalTwin(SAMPLE_CSV)
+    twin.build()
+    rows = len(twin.df)
+
+    np.random.seed(0)
+    for _ in range(50):
+        risk = twin.append_entry(10, 0.0, mood="anxious")
+
+    assert len(twin.df) == rows
+    assert twin.stats.count == rows + 50
+    assert len(twin.live_entries) == 50
+    assert risk == twin.risk and twin.predict_depression() > 70
+
+
+def test_live_notes_use_the_same_denominator_as_a_rebuild():
+    """Empty live notes count as 0, so incremental and rebuilt note means agree"""
+    df = pd.DataFrame({"date": ["2025-01-01", "2025-01-02", "2025-01-03"], "mood": ["happy", "anxious", "neutral"],
+                       "stress": [3.0, 8.0, 5.0], "sleep_hours": [8.0, 5.0, 7.0],
+                       "notes": ["calm and relaxed", None, "worried and anxious"]})
+    twin = DigitalTwin(frame=df)
+    twin.build()
+    # Mood counts are filled without streaming too
+    assert twin.stats.mood_counts == {"happy": 1, "anxious": 1, "neutral": 1}
+    live = [(9, 4.0, "panic, cannot sleep"), (4, 7.5, ""), (5, 7.0, "")]
+    for stress, sleep, note in live:
+        twin.append_entry(stress, sleep, mood="anxious", notes=note)
+    assert twin.stats.mood_counts["anxious"] == 4
+
+    rows = pd.DataFrame([{"stress": st, "sleep_hours": sl, "notes": n} for st, sl, n in live])
+    rebuilt = DigitalTwin(frame=pd.concat([df, rows], ignore_index=True))
+    rebuilt.aggregate()
+    assert twin.stats.note_count == rebuilt.stats.note_count == 6
+    assert np.isclose(twin.stats.avg_note_distress, rebuilt.stats.avg_note_distress)
+
+
+def test_streaming_ingest_matches_full_read(tmp_path):
+    """Chunked ingestion yields the same aggregates as reading the whole CSV"""
+    rng = np.random.default_rng(1)
+    n = 2500
+    big = pd.DataFrame({
+        "date": pd.date_range("2020-01-01", periods=n, freq="D").strftime("%Y-%m-%d"),
+        "mood": rng.choice(["happy", "neutral", "anxious", "depressed"], n),
+        "stress": rng.uniform(1, 10, n).round(1),
+        "sleep_hours": rng.uniform(3, 9, n).round(1),
+        "notes": "free text that should not be loaded",
+    })
+    path = tmp_path / "big.csv"
+    big.to_csv(path, index=False)
+
+    twin = DigitalTwin(str(path), stream=True, chunksize=400)
+    twin.build()
+
+    report = twin.ingest_report
+    assert report.rows == n and report.chunks == 7
+    assert report.rows_per_sec > 0 and report.peak_chunk_bytes > 0
+    assert "notes" not in twin.df.columns and len(twin.df) == 7
+    assert twin.df["stress"].dtype == np.float32
+    assert np.isclose(twin.stats.avg_stress, big["stress"].mean(), atol=1e-4)
+    assert sum(twin.stats.mood_counts.values()) == n
+    assert twin.stats.mood_counts == big["mood"].value_counts().to_dict()
+    # Chunks with different mood sets still give a categorical tail
+    big.loc[n - 3:, "mood"] = "elated"
+    big.to_csv(path, index=False)
+    tail = DigitalTwin(str(path), stream=True, chunksize=400).df
+    assert isinstance(tail["mood"].dtype, pd.CategoricalDtype)
+    assert tail["mood"].tolist() == big["mood"].tail(7).tolist()
+
+
+def test_parquet_store_reads_columns_and_date_range(tmp_path):
+    """Uploads convert to Parquet once and DigitalTwin loads a projected date slice"""
+    with open(SAMPLE_CSV, "rb") as f:
+        payload = f.read()
+
+    path = save_upload(str(tmp_path), "diary.csv", payload)
+    assert path.endswith(".parquet")
+    mtime = os.path.getmtime(path)
+    assert save_upload(str(tmp_path), "diary.csv", payload) == path
+    assert os.path.getmtime(path) == mtime
+
+    twin = DigitalTwin(path, columns=["date", "stress", "sleep_hours"], start="2025-11-09", end="2025-11-11")
+    assert list(twin.df.columns) == ["date", "stress", "sleep_hours"]
+    assert len(twin.df) == 3
+    twin.build()
+    assert np.isclose(twin.stats.avg_stress, np.mean([7.8, 4.1, 8.5]))
+
+
+def test_registry_shares_frames_and_evicts_lru(tmp_path):
+    """Twins for the same diary share one frame; idle diaries are evicted past the budget"""
+    registry = TwinRegistry()
+    first = registry.twin(SAMPLE_CSV)
+    second = registry.twin(SAMPLE_CSV)
+    assert first is not second and first.df is second.df
+
+    first.build()
+    first.append_entry(10, 0.0)
+    assert len(second.live_entries) == 0
+    assert registry.stats()["hits"] == 1 and registry.stats()["misses"] == 1
+
+    registry.max_bytes = registry.used_bytes
+    other = tmp_path / "other.csv"
+    other.write_bytes(open(SAMPLE_CSV, "rb").read())
+    registry.twin(str(other))
+    stats = registry.stats()
+    assert stats["evictions"] == 1 and stats["diaries"] == 1
+
+
+def test_notes_enrichment_scores_each_distinct_note_once():
+    """build() adds a cached note_distress column and passes its mean to the risk score"""
+    from twin.enrich import NOTE_COLUMN, NoteScoreCache, score_notes
+    from predictor.risk import predict_depression
+
+    cache = NoteScoreCache()
+    notes = pd.Series(["panic attack", "feeling calm and relaxed", None, "panic attack"] * 1000)
+    scores = score_notes(notes, cache=cache)
+    assert scores.dtype == np.float32 and len(scores) == len(notes)
+    assert scores[0] > 0 > scores[1] and scores[2] == 0
+    assert cache.misses == 2 and cache.hits == 0
+    score_notes(notes, cache=cache)
+    assert cache.hits == 2
+
+    shared = pd.read_csv(SAMPLE_CSV)
+    twin = DigitalTwin(frame=shared)
+    twin.build(rng=np.random.default_rng(0))
+    assert NOTE_COLUMN in twin.df.columns and NOTE_COLUMN not in shared.columns
+    assert np.isclose(twin.stats.avg_note_distress, twin.df[NOTE_COLUMN].mean())
+    expected = predict_depression(twin.stats.avg_stress, twin.stats.avg_sleep, rng=np.random.default_rng(0),
+                                  note_distress=twin.stats.avg_note_distress)
+    assert twin.risk == expected
+
+
+def test_upload_ingestion_parses_each_unique_payload_once():
+    """Uploads are keyed by content hash; bad diaries raise ValueError"""
+    import pytest
+    registry = TwinRegistry()
+    payload = open(SAMPLE_CSV, "rb").read()
+
+    digest, twin = registry.upload(payload)
+    again, frame = registry.upload_frame(payload)
+    assert again == digest and frame is twin.df
+    assert registry.stats()["misses"] == 1 and registry.stats()["hits"] == 1
+    assert twin.df["stress"].dtype == np.float32
+    assert pd.api.types.is_datetime64_any_dtype(twin.df["date"])
+
+    with pytest.raises(ValueError, match="sleep_hours"):
+        registry.upload_frame(b"date,mood,stress\n2025-11-08,happy,3\n")
+    with pytest.raises(ValueError):
+        registry.upload_frame(b"date,mood,stress,sleep_hours\n2025-11-08,happy,high,7\n")
+
+
+def test_persisted_upload_reloads_from_parquet_in_a_new_process(tmp_path, monkeypatch):
+    """With a data_dir, an upload is saved under its digest and later reloaded without reparsing"""
+    import pytest
+    import twin.store
+    payload = open(SAMPLE_CSV, "rb").read()
+    digest, frame = TwinRegistry().upload_frame(payload, data_dir=str(tmp_path))
+    assert sorted(os.listdir(tmp_path)) == [f"uploaded_{digest}.parquet"]
+
+    def no_parse(payload):
+        raise AssertionError("stored upload was reparsed")
+    monkeypatch.setattr(twin.store, "parse_upload", no_parse)
+    again, reloaded = TwinRegistry().upload_frame(payload, data_dir=str(tmp_path))
+    assert again == digest and list(reloaded.columns) == list(frame.columns)
+    pd.testing.assert_frame_equal(reloaded, frame)
+    monkeypatch.undo()
+
+    with pytest.raises(ValueError):
+        TwinRegistry().upload_frame(b"date,mood,stress\n2025-11-08,happy,3\n", data_dir=str(tmp_path))
+    assert len(list(tmp_path.glob("*.parquet"))) == 1
+
+
+def test_entry_buffer_appends_in_place_and_views_without_copying():
+    """EntryBuffer grows geometrically and to_frame() shares its arrays"""
+    from twin.entries import EntryBuffer
+    buffer = EntryBuffer.from_frame(pd.read_csv(SAMPLE_CSV))
+    rows = len(buffer)
+    assert buffer.capacity == rows + 64
+    for i in range(1000):
+        buffer.append(5, 7.0, mood="anxious" if i % 2 else "calm", date="2025-12-01", notes="panic attack")
+
+    frame = buffer.to_frame()
+    assert len(frame) == rows + 1000 and buffer.version == 1001
+    assert buffer.capacity < 4 * len(buffer)
+    assert np.shares_memory(frame["stress"].to_numpy(), buffer._stress)
+    assert list(frame.columns[:5]) == ["date", "mood", "stress", "sleep_hours", "notes"]
+    assert frame["mood"].iloc[-1] == "anxious" and frame["mood"].iloc[-2] == "calm"
+    assert frame["note_distress"].iloc[-1] > 0
+    assert np.isclose(frame["stress"].mean(), (pd.read_csv(SAMPLE_CSV)["stress"].sum() + 5000) / len(frame))
+
+    buffer.append(1, 9.0)
+    assert len(frame) == rows + 1000 and len(buffer.to_frame()) == rows + 1001
+
+
+def test_heatmap_bins_weekdays_like_pandas():
+    """Calendar heatmap cells equal pandas per-day means over the window"""
+    from twin.heatmap import build_heatmap
+    rng = np.random.default_rng(5)
+    n = 3 * 365 * 2
+    dates = pd.Series(pd.date_range("2022-01-03", periods=n, freq="12h"))
+    stress = rng.uniform(1, 10, n)
+
+    heatmap = build_heatmap(dates, stress, weeks=52)
+    assert heatmap.values.shape[0] == 7 and heatmap.values.shape[1] in (52, 53)
+    daily = pd.Series(stress, index=dates).resample("D").mean()
+    last = daily.index[-1]
+    assert np.isclose(heatmap.values[last.weekday(), -1], daily.iloc[-1])
+    window = daily[daily.index > last - pd.Timedelta(weeks=52)]
+    assert np.isclose(np.nanmean(heatmap.values), window.mean())
+
+    shuffled = rng.permutation(n)
+    assert np.allclose(build_heatmap(dates.iloc[shuffled], stress[shuffled], weeks=52).values,
+                       heatmap.values, equal_nan=True)
+
+
+def test_diary_derives_each_artifact_once_per_revision():
+    """Unchanged diaries are served from the derived cache; a mutation recomputes"""
+    from twin.diary import Diary, DerivedCache
+    cache = DerivedCache()
+    diary = Diary.from_frame(pd.read_csv(SAMPLE_CSV), cache=cache)
+
+    for _ in range(3):
+        frame = diary.frame()
+        trend = diary.trend()
+        debt = diary.sleep_debt()
+        text = diary.to_string()
+    assert diary.frame() is frame and diary.trend() is trend
+    assert np.isclose(debt, len(frame) * 7.5 - frame["sleep_hours"].sum())
+    assert "sleep_hours" in text
+
+    before = cache.stats()
+    assert before["misses"] == 4 and before["hit_rate"] > 0.7
+    assert before["artifacts"]["trend"]["misses"] == 1
+
+    revision = diary.revision
+    diary.append(5, 7.0, mood="neutral", date="2025-12-01")
+    assert diary.revision != revision
+    assert len(diary.frame()) == len(frame) + 1 and diary.trend() is not trend
+    assert cache.stats()["misses"] > before["misses"]
+
+    # Bounded by bytes too: a zero-copy frame counts the buffer arrays it pins
+    from twin.diary import approx_nbytes
+    assert approx_nbytes(diary.frame()) >= diary.entries.capacity * 4 * 2
+    # Room for the CSV or the text dump, not both (the frame alone is over budget)
+    small = DerivedCache(max_bytes=max(len(diary.to_csv()), len(diary.to_string())) + 16)
+    diary = Diary.from_frame(pd.read_csv(SAMPLE_CSV), cache=small)
+    csv = diary.to_csv()
+    assert diary.to_csv() is csv
+    diary.to_string()
+    assert small.stats()["used_bytes"] <= small.max_bytes and small.stats()["evictions"] == 1
+    assert diary.to_csv() is not csv
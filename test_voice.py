@@ -0,0 +1,96 @@
+"""
+NeuroTwin voice analysis tests
+Checks tone detection on synthetic audio without a running Streamlit server
+"""
+
+import sys
+import os
+import io
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'NeuroTwin'))
+
+from voice.analysis import classify_tone, analyze_audio
+
+sf = pytest.importorskip("soundfile")
+pytest.importorskip("librosa")
+
+
+def make_wav(seconds=1.0, sr=16000, freq=220.0, channels=1):
+    t = np.arange(int(seconds * sr)) / sr
+    y = (0.3 * np.sin(2 * np.pi * freq * t)).astype(np.float32)
+    if channels > 1:
+        y = np.stack([y] * channels, axis=1)
+    buf = io.BytesIO()
+    sf.write(buf, y, sr, format="WAV")
+    return buf.getvalue()
+
+
+def test_classify_tone_thresholds():
+    """The heuristic maps bright/energetic audio to anxious and tonal audio to calm"""
+    assert classify_tone(-10, 0.2, 2500) == "anxious"
+    assert classify_tone(1, 0.2, 500) == "anxious"
+    assert classify_tone(-10, 0.7, 500) == "calm"
+    assert classify_tone(-10, 0.2, 500) == "depressed"
+
+
+def test_analyze_audio_returns_features_and_tone():
+    """analyze_audio decodes bytes and returns averaged features plus a tone"""
+    result = analyze_audio(make_wav(seconds=1.0))
+    assert set(result) >= {"tone", "avg_mfcc", "avg_chroma", "avg_centroid", "duration"}
+    assert result["tone"] in ("anxious", "calm", "depressed")
+    assert abs(result["duration"] - 1.0) < 1e-6
+
+
+def test_single_stft_features_downmix_and_resample():
+    """Stereo input is downmixed and resampled, matching the mono result"""
+    from voice.features import extract_features, TARGET_SR
+    mono = analyze_audio(make_wav(seconds=2.0, sr=16000))
+    stereo = analyze_audio(make_wav(seconds=2.0, sr=16000, channels=2))
+    assert np.isclose(mono["avg_centroid"], stereo["avg_centroid"], rtol=1e-4)
+    assert np.isclose(mono["duration"], 2.0, atol=1e-3)
+
+    features = extract_features(np.zeros(TARGET_SR, dtype=np.float32), TARGET_SR)
+    assert features["duration"] == 1.0
+
+
+def test_streaming_analysis_tracks_full_clip():
+    """Block-wise analysis yields provisional tones and converges to the full-clip features"""
+    from voice.stream import iter_analysis
+    wav = make_wav(seconds=6.0, sr=16000, freq=330.0)
+    full = analyze_audio(wav)
+    partials = list(iter_analysis(wav, block_seconds=2.0))
+
+    assert [round(p["duration"]) for p in partials] == [2, 4, 6]
+    assert all(p["tone"] in ("anxious", "calm", "depressed") for p in partials)
+    assert np.isclose(partials[-1]["avg_centroid"], full["avg_centroid"], rtol=0.02)
+
+
+def test_voice_analyzer_pool_returns_futures_and_streams_partials(monkeypatch):
+    """WAV bytes go through the spawn pool; long clips stream provisional results back"""
+    import voice.stream
+    from voice.analysis import VoiceAnalyzer, _warm_worker
+    analyzer = VoiceAnalyzer(max_workers=1)
+    try:
+        assert analyzer._pool._mp_context.get_start_method() == "spawn"
+        # A failing initializer would break the pool instead of resolving these
+        assert analyzer._pool._initializer is _warm_worker
+        assert [f.result(timeout=120) for f in analyzer.warm()] == [None]
+        wav = make_wav(seconds=1.0)
+        future = analyzer.submit(wav)
+        result = future.result(timeout=120)
+        expected = analyze_audio(wav)
+        assert result["tone"] == expected["tone"]
+        assert np.isclose(result["avg_centroid"], expected["avg_centroid"])
+
+        # Anything over the threshold is analyzed block by block in the worker
+        monkeypatch.setattr(voice.stream, "STREAM_THRESHOLD_SECONDS", 1.0)
+        long_wav = make_wav(seconds=25.0, freq=330.0)
+        job = analyzer.analyze(long_wav)
+        assert job._progress is not None
+        final = job.result(timeout=120)
+        assert job.done() and job.error is None
+        assert job.poll()["duration"] == final["duration"] and np.isclose(final["duration"], 25.0)
+    finally:
+        analyzer.shutdown()